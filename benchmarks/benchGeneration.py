@@ -0,0 +1,45 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components")) # so the components modules can be imported
+from generator import generatePuzzle, generateMany
+
+# Throughput benchmark for headless puzzle generation, run from the repo root:
+#   python benchmarks/benchGeneration.py --count 20000 --workers 4
+
+def loadWords(theme):
+    with open("components/themes.json", "r") as f:
+        return json.load(f)[theme]
+
+def benchSingle(wordList, count, size=None, numWords=5): # puzzles / sec on a single core, no pool
+    start = time.perf_counter()
+    for seed in range(count):
+        generatePuzzle(wordList, seed=seed, size=size, numWords=numWords)
+    elapsed = time.perf_counter() - start
+    return {"mode": "single", "count": count, "seconds": elapsed, "puzzlesPerSec": count / elapsed}
+
+def benchPool(wordList, count, workers=None, size=None, numWords=5): # puzzles / sec across the process pool
+    start = time.perf_counter()
+    generateMany(count, wordList, workers=workers, seed=0, size=size, numWords=numWords)
+    elapsed = time.perf_counter() - start
+    return {"mode": "pool", "workers": workers or os.cpu_count(), "count": count, "seconds": elapsed, "puzzlesPerSec": count / elapsed}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--theme", default="Animals")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--size", type=int, default=None)
+    args = parser.parse_args()
+
+    words = loadWords(args.theme)
+    results = [
+        benchSingle(words, max(1, args.count // 10), size=args.size),
+        benchPool(words, args.count, workers=args.workers, size=args.size),
+    ]
+    for result in results:
+        print(json.dumps(result))
+        print(f"  -> {result['puzzlesPerSec'] * 60:,.0f} puzzles / minute")
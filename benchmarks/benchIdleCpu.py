@@ -0,0 +1,51 @@
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components")) # so the components modules can be imported
+import pygame
+import main
+import database
+from profiling import CpuMeter
+
+# CPU used by each screen while nobody touches it, redrawing every frame against waiting for input.
+# Run from the repo root:
+#   python benchmarks/benchIdleCpu.py --seconds 5
+
+def idle(manager, seconds): # running the main loop until a QUIT event posted by a timer
+    manager.running = True
+    pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), loops=1)
+    manager.run()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5) # per screen, per mode
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, os.path.basename(database.DB_PATH))
+        shutil.copy(database.DB_PATH, path) # the game's puzzles are stored in the copy, not the real database
+        manager = main.setup()
+        main.startServices(path=path)
+        manager.push("mainMenu")
+        manager.applyPending()
+        for idleWait in (False, True):
+            manager.idleWait = idleWait
+            manager.cpuMeter = CpuMeter()
+            idle(manager, args.seconds)
+            manager.push("themeChoice")
+            manager.applyPending()
+            manager.getTop().play(main.themeStore.getNames()[0], main.themeStore.getNames()[0])
+            manager.applyPending()
+            idle(manager, args.seconds)
+            manager.popToRoot()
+            manager.applyPending()
+            print("waiting for input" if idleWait else f"redrawing at up to {manager.fps} fps")
+            print(manager.cpuMeter.report())
+        main.puzzlePool.close()
+        main.db.close()
+        main.themeStore.close()
+    pygame.quit()
@@ -0,0 +1,48 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components")) # so the components modules can be imported
+import database
+
+# Leaderboard query timings against a throwaway database filled with fake scores, run from the repo root:
+#   python benchmarks/benchLeaderboard.py --rows 1000000
+
+def fillScores(conn, rows, themes, seed=0):
+    rng = random.Random(seed)
+    with conn:
+        conn.executemany("INSERT INTO Players(username, themeName, time) VALUES (?, ?, ?)", ((f"player{idx}", rng.choice(themes), rng.randint(5000, 600000)) for idx in range(rows)))
+
+def timeQuery(func, repeats): # average seconds per call
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--themes", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=1000)
+    args = parser.parse_args()
+
+    themes = [f"Theme{idx}" for idx in range(args.themes)]
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = database.connect(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        fillScores(conn, args.rows, themes)
+        fillSeconds = time.perf_counter() - start
+
+        results = {
+            "rows": args.rows,
+            "fillSeconds": fillSeconds,
+            "topOverallMs": timeQuery(lambda: database.topScores(conn, 8), args.repeats) * 1000,
+            "topThemeMs": timeQuery(lambda: database.topScores(conn, 8, themes[0]), args.repeats) * 1000,
+            "plan": [row[3] for row in conn.execute("EXPLAIN QUERY PLAN SELECT username, themeName, time FROM Players WHERE themeName = ? ORDER BY time ASC LIMIT 8", (themes[0],))],
+        }
+        conn.close()
+    print(json.dumps(results))
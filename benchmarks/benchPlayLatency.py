@@ -0,0 +1,59 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components")) # so the components modules can be imported
+import pygame
+import main
+import database
+from puzzlePool import PuzzlePool
+
+# Click to first frame latency for starting a game, with and without the pre-generation pool.
+# Run from the repo root:
+#   python benchmarks/benchPlayLatency.py --games 200 --depths 0 2
+
+def playGames(manager, themes, games, thinkTime): # clicking a theme, drawing the first frame, then back to the theme list
+    manager.push("themeChoice")
+    manager.applyPending()
+    for game in range(games):
+        theme = themes[game % len(themes)]
+        manager.getTop().play(theme, theme)
+        manager.applyPending()
+        manager.getTop().draw()
+        manager.pop()
+        manager.applyPending()
+        time.sleep(thinkTime) # the player reading the screen, which is when the pool catches up
+    manager.popToRoot()
+    manager.applyPending()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--think", type=float, default=0.05) # seconds between games
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, os.path.basename(database.DB_PATH))
+        shutil.copy(database.DB_PATH, path) # the real themes, without the benchmark's puzzles ending up in the real database
+        manager = main.setup()
+        main.startServices(path=path)
+        manager.push("mainMenu")
+        manager.applyPending()
+        themes = main.themeStore.getNames()
+        for depth in args.depths:
+            main.puzzlePool.close()
+            main.puzzlePool = PuzzlePool(depth=depth, sampleWords=main.SAMPLE_WORDS, maxLength=main.MAX_WORD_LENGTH, path=path)
+            main.puzzlePool.prime(themes)
+            time.sleep(0.5) # letting the pool fill, like the time spent on the main menu
+            playGames(manager, themes, args.games, args.think)
+            print(json.dumps(dict(depth=depth, **main.puzzlePool.getStats())))
+        main.puzzlePool.close()
+        main.db.close()
+        main.themeStore.close()
+    pygame.quit()
@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components")) # so the components modules can be imported
+import pygame
+import main
+import database
+
+# A recorded session (main.py --record PATH) played back through every screen as fast as it will go, on a copy of the
+# database, reporting the frame times of each scene and the whole replay. Replays make the same puzzles from the recorded
+# seed, so runs can be compared. One session per process, the game's services are module globals. From the repo root:
+#   python benchmarks/benchReplay.py benchmarks/sessions/playFinishLeaderboard.session
+# benchmarks/suite.py runs every session in benchmarks/sessions this way
+
+SESSIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions")
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+class SceneTimes: # in place of the manager's CpuMeter, the wall time of every frame by the scene it ended on
+    def __init__(self):
+        self.times = {} # scene name -> [seconds]
+        self.last = time.perf_counter()
+
+    def record(self, sceneName):
+        now = time.perf_counter()
+        self.times.setdefault(sceneName, []).append(now - self.last)
+        self.last = now
+
+def replay(path, realtime=False): # (seconds, frames, SceneTimes)
+    with tempfile.TemporaryDirectory() as tmp:
+        dbPath = os.path.join(tmp, os.path.basename(database.DB_PATH))
+        shutil.copy(database.DB_PATH, dbPath) # the real themes and scores, which the replay can change
+        manager = main.setup()
+        manager.push("mainMenu")
+        manager.applyPending()
+        main.startSession(manager, replay=path, realtime=realtime, path=dbPath)
+        manager.cpuMeter = times = SceneTimes()
+        start = time.perf_counter()
+        manager.run()
+        seconds = time.perf_counter() - start
+        main.puzzlePool.close()
+        main.db.close()
+    pygame.quit()
+    return seconds, manager.frame, times
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("session") # a file written by main.py --record
+    parser.add_argument("--realtime", action="store_true") # at the recorded pace, for watching rather than timing
+    args = parser.parse_args()
+
+    seconds, frames, times = replay(args.session, args.realtime)
+    allTimes = [value for values in times.times.values() for value in values]
+    print(json.dumps({"session": os.path.basename(args.session), "frames": frames, "seconds": seconds, "p50Ms": percentile(allTimes, 0.5) * 1000, "p99Ms": percentile(allTimes, 0.99) * 1000}))
+    for name, values in sorted(times.times.items()):
+        print(json.dumps({"scene": name, "frames": len(values), "totalMs": sum(values) * 1000, "p50Ms": percentile(values, 0.5) * 1000, "p99Ms": percentile(values, 0.99) * 1000}))
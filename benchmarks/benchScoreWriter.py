@@ -0,0 +1,51 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components")) # so the components modules can be imported
+import database
+
+# Score submission benchmark: how long submitScore blocks the caller (the UI thread in the game),
+# and how many inserts / sec the background writer commits. Run from the repo root:
+#   python benchmarks/benchScoreWriter.py --count 100000
+
+def benchWriter(path, count):
+    db = database.Database(path)
+    callTimes = []
+    start = time.perf_counter()
+    for idx in range(count):
+        callStart = time.perf_counter()
+        db.submitScore(f"player{idx}", "Animals", 5000 + idx)
+        callTimes.append(time.perf_counter() - callStart)
+    submitted = time.perf_counter() - start
+    db.flush()
+    elapsed = time.perf_counter() - start
+    rows = db.conn.execute("SELECT COUNT(*) FROM Players").fetchone()[0]
+    db.close()
+
+    callTimes.sort()
+    return {
+        "mode": "writer", "count": count, "rows": rows, "seconds": elapsed, "insertsPerSec": count / elapsed,
+        "submitSeconds": submitted, "submitP99Us": callTimes[int(len(callTimes) * 0.99)] * 1e6, "submitMaxUs": callTimes[-1] * 1e6,
+    }
+
+def benchDirect(path, count): # the old way: one connection, insert and commit per score
+    start = time.perf_counter()
+    for idx in range(count):
+        conn = database.connect(path, synchronous="FULL")
+        database.addScore(conn, f"player{idx}", "Animals", 5000 + idx)
+        conn.close()
+    elapsed = time.perf_counter() - start
+    return {"mode": "direct", "count": count, "seconds": elapsed, "insertsPerSec": count / elapsed}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(json.dumps(benchWriter(os.path.join(tmp, "writer.db"), args.count)))
+        print(json.dumps(benchDirect(os.path.join(tmp, "direct.db"), max(1, args.count // 100))))
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+# Load test for components/server.py: hundreds of keep-alive clients on localhost sending a kiosk-like mix of leaderboard
+# reads, score batches and puzzle requests, reporting requests / sec and latency percentiles per kind of request.
+# The server runs in its own process on a copy of the database. Run from the repo root:
+#   python benchmarks/benchService.py --clients 200 --seconds 10
+
+MIX = [("topScores", 0.7), ("submitScores", 0.25), ("readyPuzzle", 0.03), ("seededPuzzle", 0.02)] # share of requests of each kind, a kiosk asks for one puzzle a game
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components", "server.py")
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def makeRequest(kind, rng, themes):
+    if kind == "topScores":
+        return "GET", "/scores?limit=8", None
+    if kind == "submitScores":
+        return "POST", "/scores", {"scores": [[f"kiosk{rng.randrange(100)}", rng.choice(themes), rng.randrange(5000, 300000), None] for _ in range(rng.randint(1, 5))]}
+    if kind == "readyPuzzle":
+        return "GET", f"/puzzle?theme={rng.choice(themes)}", None
+    return "GET", f"/puzzle?theme={rng.choice(themes)}&seed={rng.randrange(20)}", None # a few seeds, like the daily puzzle
+
+async def send(reader, writer, method, path, payload): # the status of one request on a keep-alive connection
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(b"%s %s HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n\r\n%s" % (method.encode(), path.encode(), len(body), body))
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+async def runClient(port, seed, deadline, themes, latencies, errors):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    kinds, weights = zip(*MIX)
+    while time.perf_counter() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        start = time.perf_counter()
+        status = await send(reader, writer, *makeRequest(kind, rng, themes))
+        latencies[kind].append(time.perf_counter() - start)
+        if status >= 400:
+            errors[kind] = errors.get(kind, 0) + 1
+    writer.close()
+
+async def runLoad(port, clients, seconds, themes):
+    latencies = {kind: [] for kind, _ in MIX}
+    errors = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(runClient(port, idx, start + seconds, themes, latencies, errors) for idx in range(clients)))
+    return latencies, errors, time.perf_counter() - start
+
+def getJson(port, path):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5) as response:
+        return json.load(response)
+
+def startServer(path, port, workers):
+    server = subprocess.Popen([sys.executable, SERVER, "--db", path, "--port", str(port), "--workers", str(workers)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(200): # until it answers
+        try:
+            return server, getJson(port, "/themes")["names"]
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("the server didn't start")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "database.db")
+        shutil.copy("components/database.db", path) # the real themes, without touching the real scores
+        server, themes = startServer(path, args.port, args.workers)
+        try:
+            time.sleep(1) # letting the pools fill
+            latencies, errors, elapsed = asyncio.run(runLoad(args.port, args.clients, args.seconds, themes))
+            stats = getJson(args.port, "/stats")
+        finally:
+            server.terminate()
+            server.wait()
+
+    allLatencies = [value for values in latencies.values() for value in values]
+    print(json.dumps({"clients": args.clients, "seconds": elapsed, "requests": len(allLatencies), "requestsPerSec": len(allLatencies) / elapsed, "p50Ms": percentile(allLatencies, 0.5) * 1000, "p99Ms": percentile(allLatencies, 0.99) * 1000, "errors": errors, "server": stats}))
+    for kind, values in latencies.items():
+        if values:
+            print(json.dumps({"kind": kind, "requests": len(values), "p50Ms": percentile(values, 0.5) * 1000, "p99Ms": percentile(values, 0.99) * 1000}))
@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components")) # so the components modules can be imported
+from themeStore import ThemeStore
+
+# Theme loading benchmark: re-reading a big themes.json every visit against the cached theme store.
+# Run from the repo root:
+#   python benchmarks/benchThemes.py --themes 5000
+
+def makeThemes(count, wordsPerTheme, seed=0):
+    rng = random.Random(seed)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return {f"Theme{idx}": ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(wordsPerTheme)] for idx in range(count)}
+
+def timeIt(func, repeats): # average seconds per call
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+def jsonVisit(jsonPath, theme): # what choosing a theme and starting a game used to cost: two full parses
+    with open(jsonPath, 'r') as f:
+        names = list(json.load(f).keys())
+    with open(jsonPath, 'r') as f:
+        return names, json.load(f)[theme]
+
+def jsonAdd(jsonPath, name, words): # and adding a theme: a full parse and a full rewrite
+    with open(jsonPath, 'r') as f:
+        themes = json.load(f)
+    themes[name] = words
+    with open(jsonPath, 'w') as f:
+        f.write(json.dumps(themes, indent=4))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--themes", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    themes = makeThemes(args.themes, args.words)
+    theme = f"Theme{args.themes // 2}"
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonPath = os.path.join(tmp, "themes.json")
+        with open(jsonPath, 'w') as f:
+            f.write(json.dumps(themes, indent=4))
+
+        start = time.perf_counter()
+        store = ThemeStore(os.path.join(tmp, "themes.db"), jsonPath)
+        importSeconds = time.perf_counter() - start
+
+        results = {
+            "themes": args.themes,
+            "importSeconds": importSeconds,
+            "jsonVisitMs": timeIt(lambda: jsonVisit(jsonPath, theme), args.repeats) * 1000,
+            "storeVisitMs": timeIt(lambda: (store.getNames(), store.getWords(theme)), args.repeats * 100) * 1000,
+            "jsonAddMs": timeIt(lambda: jsonAdd(jsonPath, "New", ["ONE", "TWO"]), args.repeats) * 1000,
+            "storeAddMs": timeIt(lambda: store.addTheme("New", ["ONE", "TWO"]), args.repeats) * 1000,
+        }
+        store.close()
+    print(json.dumps(results))
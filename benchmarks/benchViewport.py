@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components")) # so the components modules can be imported
+import pygame
+import main
+
+# Frame times and memory of the play screen against grid size, with every cell on screen (PlayMenu) and through
+# the viewport (ViewportPlayMenu). Random letters stand in for a puzzle, since the placer can't fill a 1000x1000 grid
+# in its time budget. Run from the repo root:
+#   python benchmarks/benchViewport.py --sizes 50 200 1000
+
+class FakeMouse: # the dummy video driver has no real mouse
+    pos = (0, 0)
+
+def makeGrid(size, seed=0): # grid[x][y] of random letters, with 5 words' worth of coordinates along the top rows
+    rng = random.Random(seed)
+    grid = [[rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(size)] for _ in range(size)]
+    wordCoords = [[[0, row], [4, row]] for row in range(5)]
+    return grid, ["".join(grid[x][row] for x in range(5)) for row in range(5)], wordCoords
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def timeFrames(scene, frames, before=None): # per frame seconds of update + draw, calling before(frame) first
+    times = []
+    for frame in range(frames):
+        if before:
+            before(frame)
+        start = time.perf_counter()
+        scene.update()
+        scene.draw()
+        times.append(time.perf_counter() - start)
+    return times
+
+def benchScene(manager, sceneClass, size, frames): # build time, memory, and frame times for one grid size
+    grid, words, wordCoords = makeGrid(size)
+    tracemalloc.start()
+    start = time.perf_counter()
+    scene = sceneClass(manager, grid, words, wordCoords, words, "Bench")
+    buildSeconds = time.perf_counter() - start
+    sceneBytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    scene.enter()
+
+    full = timeFrames(scene, frames, lambda frame: scene.renderer.invalidate())
+    idle = timeFrames(scene, frames)
+    def click(frame): # clicking around the middle of the board, then the handling is part of the frame
+        FakeMouse.pos = (150 + (frame * 37) % 300, 150 + (frame * 53) % 300)
+        scene.handleEvent(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=FakeMouse.pos, button=1))
+    clicks = timeFrames(scene, frames, click)
+    result = {"shownCells": scene.board.view[2] * scene.board.view[3], "bytesPerCell": sceneBytes / size**2, "buildMs": buildSeconds * 1000, "sceneMB": sceneBytes / 2**20, "fullFrameP50Ms": percentile(full, 0.5) * 1000, "idleFrameP50Ms": percentile(idle, 0.5) * 1000, "clickFrameP99Ms": percentile(clicks, 0.99) * 1000}
+
+    if isinstance(scene, main.ViewportPlayMenu):
+        def pan(frame): # back and forth, a cell at a time
+            key = pygame.K_RIGHT if frame % 20 < 10 else pygame.K_LEFT
+            scene.handleEvent(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode=""))
+        result["panFrameP50Ms"] = percentile(timeFrames(scene, frames, pan), 0.5) * 1000
+        result["panFrameP99Ms"] = percentile(timeFrames(scene, frames, pan), 0.99) * 1000
+    scene.exit()
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--full-max", type=int, default=200) # biggest grid also timed with every cell on screen
+    args = parser.parse_args()
+
+    pygame.mouse.get_pos = lambda: FakeMouse.pos
+    manager = main.setup()
+    for size in args.sizes:
+        for sceneClass in (main.PlayMenu, main.ViewportPlayMenu):
+            if sceneClass is main.PlayMenu and size > args.full_max:
+                continue
+            print(json.dumps({"size": size, "scene": sceneClass.__name__, **benchScene(manager, sceneClass, size, args.frames)}))
+    pygame.quit()
@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components")) # so the components modules can be imported
+from themeStore import ThemeStore
+from wordImport import importFile
+
+# Bulk word import benchmark: writes a big word list (with repeats and junk in it), streams it into a theme,
+# then times drawing words for a game from it. Run from the repo root:
+#   python benchmarks/benchWordImport.py --words 2000000
+
+def writeWordFile(path, count, seed=0): # roughly 10% repeats and 5% words the importer should reject
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    recent = []
+    with open(path, 'w') as f:
+        for idx in range(count):
+            roll = rng.random()
+            if roll < 0.1 and recent:
+                word = rng.choice(recent)
+            elif roll < 0.15:
+                word = "".join(rng.choice(letters) for _ in range(rng.randint(2, 6))) + rng.choice(["'s", "-x", "9", "é"])
+            else:
+                word = "".join(rng.choice(letters) for _ in range(rng.randint(2, 18)))
+                recent = (recent + [word])[-1000:]
+            f.write(word + "\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=2000000)
+    parser.add_argument("--sample", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wordPath = os.path.join(tmp, "words.txt")
+        writeWordFile(wordPath, args.words)
+        store = ThemeStore(os.path.join(tmp, "words.db"), jsonPath=os.path.join(tmp, "none.json"))
+        results = importFile(store, "Dictionary", wordPath, minLength=3, maxLength=15)
+
+        rng = random.Random(1)
+        store.getBuckets("Dictionary") # building the bucket counts once, like the first game would
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            store.sampleWords("Dictionary", args.sample, maxLength=12, rng=rng)
+        results['sampleMs'] = (time.perf_counter() - start) / args.repeats * 1000
+        results['fileMB'] = os.path.getsize(wordPath) / (1024 * 1024)
+        store.close()
+    print(json.dumps(results))
@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components")) # so the components modules can be imported
+import pygame
+import main
+import database
+import renderer
+
+# Soak test for the scene stack: plays thousands of games through the same screens a player would use
+# and reports traced memory, resident memory and stack depth as it goes. tracemalloc only sees Python's allocations,
+# the resident size also counts SDL surfaces such as the cached static layers. Run from the repo root:
+#   python benchmarks/soakScenes.py --games 2000
+
+def click(manager, pos): # a real click, handled by whichever scene is on top
+    pygame.mouse.set_pos(pos)
+    event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+    manager.getTop().handleEvent(event)
+    manager.applyPending()
+
+def getRssKB(): # the process's resident memory, None where /proc isn't available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def playGame(manager, theme):
+    click(manager, (main.WIDTH / 2, main.HEIGHT / 2)) # main menu -> theme choice
+    manager.step()
+    manager.getTop().play(theme, theme) # theme button -> new game
+    manager.applyPending()
+    manager.step()
+    game = manager.getTop()
+    for wordId in sorted(game.allIds):
+        game.markFound(wordId)
+        manager.step()
+    manager.step() # play menu -> finish menu
+    assert isinstance(manager.getTop(), main.FinishMenu)
+    click(manager, (main.WIDTH - 50, 25)) # finish menu -> back to the main menu
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--theme", default="Animals")
+    parser.add_argument("--every", type=int, default=250) # how often to report
+    args = parser.parse_args()
+
+    lastPos = [(0, 0)] # the dummy video driver has no real mouse
+    pygame.mouse.get_pos = lambda: lastPos[0]
+    pygame.mouse.set_pos = lambda pos: lastPos.__setitem__(0, pos)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, os.path.basename(database.DB_PATH))
+        shutil.copy(database.DB_PATH, path) # thousands of scores and puzzles, kept out of the real database
+        manager = main.setup()
+        main.startServices(path=path)
+        manager.fps = 0 # no frame cap, as fast as possible
+        manager.idleWait = False # and no waiting for input that never comes
+        manager.push("mainMenu")
+        manager.applyPending()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        baseline = rssBaseline = None
+        for game in range(1, args.games + 1):
+            playGame(manager, args.theme)
+            if game % args.every == 0:
+                current, peak = tracemalloc.get_traced_memory()
+                rss = getRssKB()
+                if baseline is None:
+                    baseline, rssBaseline = current, rss
+                print(json.dumps({"games": game, "tracedKB": round(current / 1024, 1), "peakKB": round(peak / 1024, 1), "growthKB": round((current - baseline) / 1024, 1),
+                    "rssKB": rss, "rssGrowthKB": rss - rssBaseline if rss is not None else None, "staticLayers": len(renderer._staticLayers), "stackDepth": len(manager.stack), "seconds": round(time.perf_counter() - start, 2)}))
+        main.puzzlePool.close()
+        main.db.close()
+        main.themeStore.close()
+    pygame.quit()
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "components")) # so the components modules can be imported
+import pygame
+import main
+import database
+from generator import generatePuzzle
+from benchLeaderboard import fillScores, timeQuery
+from benchViewport import FakeMouse, benchScene
+
+# Headless benchmark suite: generation, rendering, click handling, the big grid viewport, the leaderboard database and
+# replays of the recorded sessions in benchmarks/sessions.
+# Results are written as JSON, and can be compared against a saved baseline to catch regressions. From the repo root:
+#   python benchmarks/suite.py --out results.json
+#   python benchmarks/suite.py --quick --baseline benchmarks/baseline.json --tolerance 0.25
+# Each metric is the best of a few runs of the whole suite, as other work on the machine only ever makes a run slower. A
+# change only counts as a regression if it is over the metric's tolerance and also bigger than its noise floor, so a 3us
+# frame going to 4us doesn't fail the build.
+
+NOISE_FLOORS = {"ms": 4.0, "us": 100.0, "fraction": 0.02, "MB": 0.5, "bytes": 2.0} # unit -> the smallest change worth reporting, 4ms is a quarter of a frame at 60 fps
+TAIL_TOLERANCE = 0.5 # p99s are the slowest frame or two of a run, and builds are timed once under tracemalloc, both swing more than medians
+RATE_TOLERANCE = 0.35 # so do throughputs that include disk writes or a whole second of CPU
+
+def makeWords(count, seed=0): # random upper case words of 3 to 8 letters
+    rng = random.Random(seed)
+    return ["".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(3, 8))) for _ in range(count)]
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def metric(results, name, value, unit, better): # better is "higher" or "lower"
+    results[name] = {"value": value, "unit": unit, "better": better}
+
+def benchGeneration(results, sizes, wordCounts, seconds):
+    words = makeWords(2000)
+    for size in sizes:
+        for numWords in wordCounts:
+            count = failed = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < seconds:
+                try:
+                    generatePuzzle(words, seed=count + failed, size=size, numWords=numWords)
+                    count += 1
+                except ValueError: # too many words for the grid
+                    failed += 1
+            metric(results, f"generation.size{size}.words{numWords}.puzzlesPerSec", count / (time.perf_counter() - start), "puzzles/s", "higher")
+            metric(results, f"generation.size{size}.words{numWords}.failRate", failed / (count + failed), "fraction", "lower")
+
+def click(scene, pos): # seconds the scene takes to handle a click
+    FakeMouse.pos = pos
+    event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+    start = time.perf_counter()
+    scene.handleEvent(event)
+    return time.perf_counter() - start
+
+def timeFrames(scene, frames, before=None): # per frame seconds of update + draw, calling before(frame) first
+    times = []
+    for frame in range(frames):
+        if before:
+            before(frame)
+        start = time.perf_counter()
+        scene.update()
+        scene.draw()
+        times.append(time.perf_counter() - start)
+    return times
+
+def benchPlayMenu(results, manager, sizes, frames):
+    words = makeWords(2000, seed=1)
+    for size in sizes:
+        puzzle = generatePuzzle(words, seed=size, size=size, numWords=5)
+        scene = main.PlayMenu(manager, puzzle.grid, puzzle.words, puzzle.wordLocations, puzzle.cleanWords, "Bench")
+        scene.enter()
+
+        full = timeFrames(scene, frames, lambda frame: scene.renderer.invalidate())
+        idle = timeFrames(scene, frames)
+        cellCentres = [scene.board.getCentre(cellId) for cellId in range(size * size)]
+        clickTimes = []
+        clickFrames = timeFrames(scene, frames, lambda frame: clickTimes.append(click(scene, cellCentres[(frame * 7) % len(cellCentres)])))
+
+        metric(results, f"playMenu.size{size}.fullFrameP50Ms", percentile(full, 0.5) * 1000, "ms", "lower")
+        metric(results, f"playMenu.size{size}.fullFrameP99Ms", percentile(full, 0.99) * 1000, "ms", "lower")
+        metric(results, f"playMenu.size{size}.idleFrameP50Ms", percentile(idle, 0.5) * 1000, "ms", "lower")
+        metric(results, f"playMenu.size{size}.clickFrameP99Ms", percentile(clickFrames, 0.99) * 1000, "ms", "lower")
+        metric(results, f"playMenu.size{size}.clickHandleP50Us", percentile(clickTimes, 0.5) * 1e6, "us", "lower")
+        metric(results, f"playMenu.size{size}.clickHandleP99Us", percentile(clickTimes, 0.99) * 1e6, "us", "lower")
+        scene.exit()
+
+def benchViewportMenu(results, manager, sizes, frames): # frame times should stay flat as the grid grows
+    for size in sizes:
+        for name, value in benchScene(manager, main.ViewportPlayMenu, size, frames).items():
+            if name.endswith("Ms"):
+                metric(results, f"viewport.size{size}.{name}", value, "ms", "lower")
+            elif name == "sceneMB":
+                metric(results, f"viewport.size{size}.{name}", value, "MB", "lower")
+            elif name == "bytesPerCell":
+                metric(results, f"viewport.size{size}.{name}", value, "bytes", "lower")
+
+def benchLeaderboardMenu(results, manager, tmp, frames):
+    main.db = database.Database(os.path.join(tmp, "menu.db"))
+    fillScores(main.db.conn, 10000, ["Animals", "Food", "Tech"])
+    scene = main.LeaderboardMenu(manager)
+    loads = []
+    for _ in range(frames): # entering the screen, which reloads the scores
+        start = time.perf_counter()
+        scene.enter()
+        loads.append(time.perf_counter() - start)
+    full = timeFrames(scene, frames, lambda frame: scene.renderer.invalidate())
+    metric(results, "leaderboardMenu.loadP50Ms", percentile(loads, 0.5) * 1000, "ms", "lower")
+    metric(results, "leaderboardMenu.fullFrameP50Ms", percentile(full, 0.5) * 1000, "ms", "lower")
+    metric(results, "leaderboardMenu.fullFrameP99Ms", percentile(full, 0.99) * 1000, "ms", "lower")
+    main.db.close()
+
+def benchDatabase(results, tmp, rowCounts, repeats):
+    themes = [f"Theme{idx}" for idx in range(50)]
+    for rows in rowCounts:
+        conn = database.connect(os.path.join(tmp, f"rows{rows}.db"))
+        start = time.perf_counter()
+        fillScores(conn, rows, themes)
+        metric(results, f"db.rows{rows}.bulkInsertsPerSec", rows / (time.perf_counter() - start), "rows/s", "higher")
+        metric(results, f"db.rows{rows}.topOverallUs", timeQuery(lambda: database.topScores(conn, 8), repeats) * 1e6, "us", "lower")
+        metric(results, f"db.rows{rows}.topThemeUs", timeQuery(lambda: database.topScores(conn, 8, themes[0]), repeats) * 1e6, "us", "lower")
+        conn.close()
+
+    db = database.Database(os.path.join(tmp, "writer.db"))
+    count = 20000
+    start = time.perf_counter()
+    for idx in range(count):
+        db.submitScore(f"player{idx}", "Animals", 5000 + idx)
+    db.flush()
+    metric(results, "db.writer.insertsPerSec", count / (time.perf_counter() - start), "rows/s", "higher")
+    db.close()
+
+def benchReplays(results, runs): # each recorded session end to end, the median of a few runs, each in its own process
+    replayScript = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchReplay.py")
+    sessionsDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions")
+    for fileName in sorted(os.listdir(sessionsDir)):
+        name = os.path.splitext(fileName)[0]
+        values = {} # metric name -> [value from each run]
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, replayScript, os.path.join(sessionsDir, fileName)], capture_output=True, text=True, check=True, env=dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")).stdout # no pygame banner in the JSON
+            for line in output.splitlines():
+                row = json.loads(line)
+                if "session" in row: # the whole replay, then a line per scene
+                    prefix, totalMs = f"replay.{name}", row["seconds"] * 1000
+                else:
+                    prefix, totalMs = f"replay.{name}.{row['scene']}", row["totalMs"]
+                values.setdefault(f"{prefix}.totalMs", []).append(totalMs)
+                values.setdefault(f"{prefix}.frameP99Ms", []).append(row["p99Ms"])
+        for metricName, runValues in values.items():
+            metric(results, metricName, percentile(runValues, 0.5), "ms", "lower")
+
+def bestResults(runs): # each metric's best value over several runs of the suite
+    results = {}
+    for name, first in runs[0].items():
+        values = [run[name]["value"] for run in runs]
+        results[name] = dict(first, value=max(values) if first["better"] == "higher" else min(values))
+    return results
+
+def allowedChange(name, unit, tolerance): # how much worse a metric can get before it counts
+    if "P99" in name or name.endswith("buildMs"):
+        return max(tolerance, TAIL_TOLERANCE)
+    if unit.endswith("/s"):
+        return max(tolerance, RATE_TOLERANCE)
+    return tolerance
+
+def compare(results, baseline, tolerance): # metrics that got worse than the baseline by more than their tolerance and noise floor
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        if name not in results or not base["value"]:
+            continue
+        if abs(results[name]["value"] - base["value"]) <= NOISE_FLOORS.get(base["unit"], 0):
+            continue
+        ratio = results[name]["value"] / base["value"]
+        change = ratio - 1 if base["better"] == "higher" else 1 - ratio # negative means worse
+        if change < -allowedChange(name, base["unit"], tolerance):
+            regressions.append({"metric": name, "baseline": base["value"], "value": results[name]["value"], "change": change})
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quick", action="store_true") # smaller sizes for CI
+    parser.add_argument("--out", default=None) # where to write the results, stdout if not given
+    parser.add_argument("--baseline", default=None) # results from an earlier run to compare against
+    parser.add_argument("--tolerance", type=float, default=0.2) # how much worse than the baseline a metric can get, more for p99s and rates
+    parser.add_argument("--repeats", type=int, default=3) # runs of the suite, each metric is the best of them
+    args = parser.parse_args()
+
+    if args.quick:
+        genSizes, wordCounts, genSeconds, frameSizes, frames, rowCounts, replayRuns = [10, 15], [5], 0.5, [10, 20], 200, [1000, 10000], 3
+    else:
+        genSizes, wordCounts, genSeconds, frameSizes, frames, rowCounts, replayRuns = [10, 15, 25, 40], [5, 10, 20], 1.0, [10, 20, 40], 200, [1000, 10000, 100000, 1000000], 7
+    viewportSizes = [50, 200, 1000]
+
+    pygame.mouse.get_pos = lambda: FakeMouse.pos
+    manager = main.setup()
+    runs = []
+    for _ in range(args.repeats):
+        results = {}
+        benchGeneration(results, genSizes, wordCounts, genSeconds)
+        benchPlayMenu(results, manager, frameSizes, frames)
+        benchViewportMenu(results, manager, viewportSizes, frames)
+        with tempfile.TemporaryDirectory() as tmp: # fresh databases every run
+            benchLeaderboardMenu(results, manager, tmp, frames)
+            benchDatabase(results, tmp, rowCounts, 1000)
+        runs.append(results)
+    pygame.quit()
+    results = bestResults(runs)
+    benchReplays(results, replayRuns) # the median of its own runs
+
+    output = {
+        "meta": {"python": platform.python_version(), "pygame": pygame.version.ver, "platform": platform.platform(), "cpus": os.cpu_count(), "quick": args.quick, "repeats": args.repeats, "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            output["regressions"] = compare(results, json.load(f), args.tolerance)
+
+    text = json.dumps(output, indent=4)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for regression in output.get("regressions", []):
+        print(f"REGRESSION {regression['metric']}: {regression['baseline']:.4g} -> {regression['value']:.4g} ({regression['change']:+.0%})", file=sys.stderr)
+    sys.exit(1 if output.get("regressions") else 0)
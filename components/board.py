@@ -0,0 +1,132 @@
+import math
+from array import array
+import pygame
+from fonts import textCache
+
+# The letters and state of every cell of a play grid in flat byte arrays, indexed by cell id = x * size + y,
+# instead of one widget object per cell. Screen positions are worked out from the id when they're needed, and
+# drawing only walks the range of cells that overlaps the area being redrawn
+
+FINISHED = 1 # flag bits
+SELECTED = 2
+
+def lineCells(start, end): # the grid positions of a word, from one end to the other
+    dx, dy = (end[0] > start[0]) - (end[0] < start[0]), (end[1] > start[1]) - (end[1] < start[1]) # step from one end to the other
+    return [(start[0] + dx * i, start[1] + dy * i) for i in range(max(abs(end[0] - start[0]), abs(end[1] - start[1])) + 1)]
+
+class Board:
+    def __init__(self, surface, grid, palette, font, textColour):
+        self.surface = surface
+        self.size = size = len(grid)
+        self.chars = array('B', "".join("".join(column) for column in grid).encode("latin-1")) # one byte per letter
+        self.colours = array('B', bytes(size * size)) # index into palette, 0 is an untouched cell
+        self.flags = array('B', bytes(size * size)) # FINISHED / SELECTED bits
+        self.palette = palette # background first, then the highlight colours
+        self.textColour = textColour
+        self.font = font
+        self.glyphs = {} # letter code -> rendered letter, 26 surfaces shared by every cell
+        self.changed = [] # areas of cells that changed since the last draw
+        self.dirty = True # whether the whole board needs redrawing, for the renderer
+        self.drawnRect = None
+        self.layout((0, 0), (1, 1), (1, 1))
+
+    def layout(self, origin, pitch, cellSize, view=None): # where the cells go: first cell's top left, distance between cells, size of each box, (x, y, columns, rows) shown
+        self.origin = origin
+        self.pitch = pitch
+        self.cellSize = cellSize
+        self.view = view or (0, 0, self.size, self.size)
+        glyphWidth, glyphHeight = self.font.size("W")
+        self.extent = (int(max(cellSize[0], glyphWidth + 5)), int(max(cellSize[1], glyphHeight + 5))) # a cell's box plus any letter hanging off it
+        self.changed = []
+        self.dirty = True
+
+    def setFont(self, font):
+        if font is not self.font:
+            self.font = font
+            self.glyphs = {}
+            self.layout(self.origin, self.pitch, self.cellSize, self.view)
+
+    def getGlyph(self, code):
+        glyph = self.glyphs.get(code)
+        if glyph is None:
+            glyph = self.glyphs[code] = textCache.render(chr(code), self.font, self.textColour)
+        return glyph
+
+    def cellId(self, x, y):
+        return x * self.size + y
+
+    def position(self, cellId): # [x, y] in the grid
+        return list(divmod(cellId, self.size))
+
+    def cellAt(self, point): # id of the shown cell under a pixel, or None
+        col = math.floor((point[0] - self.origin[0]) / self.pitch[0])
+        row = math.floor((point[1] - self.origin[1]) / self.pitch[1])
+        if 0 <= col < self.view[2] and 0 <= row < self.view[3]:
+            return self.cellId(self.view[0] + col, self.view[1] + row)
+        return None
+
+    def getCellRect(self, cellId): # the box and letter of a cell, or None if it isn't shown
+        x, y = divmod(cellId, self.size)
+        col, row = x - self.view[0], y - self.view[1]
+        if 0 <= col < self.view[2] and 0 <= row < self.view[3]:
+            return pygame.Rect(int(self.origin[0] + col * self.pitch[0]), int(self.origin[1] + row * self.pitch[1]), *self.extent)
+        return None
+
+    def getCentre(self, cellId):
+        rect = self.getCellRect(cellId)
+        return (int(rect.x + self.cellSize[0] / 2), int(rect.y + self.cellSize[1] / 2)) if rect else None
+
+    def setColour(self, cellId, colour):
+        if self.colours[cellId] != colour:
+            self.colours[cellId] = colour
+            rect = self.getCellRect(cellId)
+            if rect:
+                self.changed.append(rect)
+
+    def select(self, cellId, colour): # a clicked cell, found cells keep their colour
+        if not self.flags[cellId] & FINISHED:
+            self.flags[cellId] |= SELECTED
+            self.setColour(cellId, colour)
+
+    def clearSelection(self, cellIds):
+        for cellId in cellIds:
+            if not self.flags[cellId] & FINISHED:
+                self.flags[cellId] &= ~SELECTED
+                self.setColour(cellId, 0)
+
+    def finish(self, cellId, colour): # part of a found word, locked to the word's colour
+        self.flags[cellId] = FINISHED
+        self.setColour(cellId, colour)
+
+    def takeChanged(self): # areas to repaint, handed to the renderer once a frame
+        changed, self.changed = self.changed, []
+        return changed
+
+    def visibleRange(self, area): # (columns, rows) of the view whose cells overlap an area, relative to the view
+        (originX, originY), (pitchX, pitchY), (extentX, extentY) = self.origin, self.pitch, self.extent
+        firstCol = max(0, math.floor((area.left - originX - extentX) / pitchX) + 1)
+        lastCol = min(self.view[2], math.ceil((area.right - originX) / pitchX))
+        firstRow = max(0, math.floor((area.top - originY - extentY) / pitchY) + 1)
+        lastRow = min(self.view[3], math.ceil((area.bottom - originY) / pitchY))
+        return range(firstCol, lastCol), range(firstRow, lastRow)
+
+    def getRect(self):
+        return pygame.Rect(int(self.origin[0]), int(self.origin[1]), int((self.view[2] - 1) * self.pitch[0]) + self.extent[0], int((self.view[3] - 1) * self.pitch[1]) + self.extent[1])
+
+    def draw(self): # the cells overlapping the clip area, the renderer has already filled the background
+        cols, rows = self.visibleRange(self.surface.get_clip())
+        (originX, originY), (pitchX, pitchY) = self.origin, self.pitch
+        cellWidth, cellHeight = min(self.cellSize[0], pitchX), min(self.cellSize[1], pitchY) # a box never covers the next cell, as when every cell painted its own background
+        viewX, viewY = self.view[0], self.view[1]
+        colours, chars, palette, fill = self.colours, self.chars, self.palette, self.surface.fill
+        letters = []
+        for col in cols:
+            left = int(originX + col * pitchX)
+            start = (viewX + col) * self.size + viewY # ids down a column are consecutive
+            for row in rows:
+                cellId = start + row
+                top = int(originY + row * pitchY)
+                if colours[cellId]: # untouched cells are the background colour already
+                    fill(palette[colours[cellId]], (left, top, cellWidth, cellHeight))
+                letters.append((self.getGlyph(chars[cellId]), (left + 5, top + 5)))
+        self.surface.blits(letters, doreturn=False)
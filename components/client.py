@@ -0,0 +1,285 @@
+import json
+import time
+import queue
+import logging
+import threading
+import http.client
+from urllib.parse import urlsplit, urlencode, quote
+import database
+from generator import Puzzle
+
+# The game's side of server.py: stand-ins for the local Database, ThemeStore, PuzzlePool and PuzzleCache with the
+# methods the screens call, so nothing else changes when a kiosk has a ServerUrl in its settings. Scores are sent
+# from a background thread in batches, like the local ScoreWriter, so finishing a game never waits on the network.
+# If the server goes away mid-session the screens carry on: puzzles are made from the local database, and the theme
+# names and scores last fetched are shown. After a failure the server is left alone for a few seconds, so a dead
+# server costs one timeout every RETRY_SECONDS rather than one on every call. Requests made during a frame give up
+# after QUICK_TIMEOUT, and theme names are fetched on a background thread, so a slow server can't freeze the screen
+
+log = logging.getLogger(__name__)
+
+RETRY_SECONDS = 5 # how long scores wait before being sent again after the server couldn't be reached
+QUICK_TIMEOUT = 0.5 # seconds a request made in the middle of a frame waits before the game carries on without it
+
+class ServiceError(Exception):
+    pass
+
+SERVICE_ERRORS = (OSError, http.client.HTTPException, ServiceError) # everything a request can fail with
+
+class ServiceClient: # one keep-alive connection to the server, only used by the thread that made it
+    def __init__(self, url, timeout=5):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self.conn = None
+        self.downUntil = 0 # time.monotonic() before which requests fail straight away, after the server couldn't be reached
+
+    def request(self, method, path, payload=None): # the decoded JSON reply, ServiceError for an error status
+        if time.monotonic() < self.downUntil:
+            raise ServiceError(f"{method} {path}: the server was unreachable a moment ago")
+        try:
+            return self.send(method, path, payload)
+        except (OSError, http.client.HTTPException):
+            self.downUntil = time.monotonic() + RETRY_SECONDS
+            raise
+
+    def send(self, method, path, payload):
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2): # the server may have closed an idle connection, so once more on a fresh one
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body, headers)
+                response = self.conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if attempt:
+                    raise
+            except (OSError, http.client.HTTPException):
+                self.close()
+                raise
+        try:
+            reply = json.loads(data or b"{}")
+        except ValueError: # something other than the puzzle server answered
+            raise ServiceError(f"{method} {path}: {response.status}, the reply isn't JSON")
+        if response.status >= 400:
+            raise ServiceError(f"{method} {path}: {response.status} {reply.get('error', '')}")
+        return reply
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+def toPuzzle(reply):
+    puzzle = Puzzle.fromDict(reply["puzzle"])
+    puzzle.key = reply["key"]
+    return puzzle
+
+class RemoteThemes: # in place of ThemeStore
+    def __init__(self, url, client, timeout=5):
+        self.url = url
+        self.client = client # for adding themes, on the game's thread
+        self.timeout = timeout
+        self.names = None
+        self.version = 0 # goes up whenever the names the server gives change, so ThemeChoice rebuilds
+        self.refreshing = None # the thread fetching the names, None before the first background fetch
+
+    def refresh(self): # fetching the names on the calling thread, raising if the server can't be reached
+        client = ServiceClient(self.url, self.timeout) # its own connection, ServiceClients stay on one thread
+        try:
+            names = client.request("GET", "/themes")["names"]
+        finally:
+            client.close()
+        if names != self.names:
+            self.names = names
+            self.version += 1
+
+    def refreshInBackground(self): # one fetch at a time, the version moves when it brings new names
+        if not self.isRefreshing():
+            self.refreshing = threading.Thread(target=self.refreshQuietly, name="RemoteThemes", daemon=True)
+            self.refreshing.start()
+
+    def refreshQuietly(self):
+        try:
+            self.refresh()
+        except SERVICE_ERRORS as error:
+            log.warning("couldn't fetch the themes, showing the last ones (%s)", error)
+
+    def isRefreshing(self):
+        return self.refreshing is not None and self.refreshing.is_alive()
+
+    def getNames(self): # the names last fetched, straight away, asking for other kiosks' new themes in the background
+        self.refreshInBackground()
+        return self.names or []
+
+    def addTheme(self, name, words):
+        try:
+            self.client.request("POST", "/themes", {"name": name, "words": words})
+        except SERVICE_ERRORS as error:
+            log.warning("couldn't add the theme %r (%s)", name, error)
+            return
+        self.refreshInBackground()
+
+class RemotePuzzles: # in place of PuzzlePool and PuzzleCache, the server keeps puzzles ready and stores them
+    def __init__(self, client, path=database.DB_PATH):
+        self.client = client
+        self.path = path # puzzles are made from this database's themes while the server is away
+        self.localStore = self.localCache = None # opened the first time they're needed
+        self.latencies = [] # seconds from clicking a theme to the first frame of the game
+
+    def getLocal(self): # (ThemeStore, PuzzleCache) on the local database
+        if self.localStore is None:
+            from themeStore import ThemeStore
+            from puzzleCache import PuzzleCache
+            self.localStore = ThemeStore(self.path) # importing themes.json if the kiosk never ran without the server
+            self.localCache = PuzzleCache(self.localStore.conn)
+        return self.localStore, self.localCache
+
+    def take(self, theme): # one of the server's ready puzzles, or None so the game asks getPuzzle for one
+        try:
+            return toPuzzle(self.client.request("GET", "/puzzle?" + urlencode({"theme": theme})))
+        except SERVICE_ERRORS as error:
+            log.warning("no ready puzzle from the server (%s)", error)
+            return None
+
+    def getPuzzle(self, store, theme, seed, sampleWords=20, maxLength=12, size=None, numWords=5): # same arguments as PuzzleCache.getPuzzle, the server uses its own word counts
+        query = {"theme": theme, "seed": seed}
+        if size is not None:
+            query["size"] = size
+        try:
+            return toPuzzle(self.client.request("GET", "/puzzle?" + urlencode(query)))
+        except SERVICE_ERRORS as error:
+            log.warning("making the puzzle here instead (%s)", error)
+        localStore, localCache = self.getLocal()
+        if theme not in localStore.getNames():
+            raise ValueError(f"{theme} is only on the server") # the screens treat it like a theme without usable words
+        return localCache.getPuzzle(localStore, theme, seed, sampleWords, maxLength, size=size, numWords=numWords)
+
+    def get(self, key): # (themeName, puzzle) for a stored puzzle, or None if neither the server nor this kiosk has it
+        try:
+            reply = self.client.request("GET", "/puzzles/" + quote(key))
+        except SERVICE_ERRORS:
+            return self.getLocal()[1].get(key) # it may have been made here while the server was away
+        return reply["themeName"], toPuzzle(reply)
+
+    def prime(self, themes): # the server fills every theme itself
+        pass
+
+    def discard(self, theme): # and throws a theme's puzzles away when its words change
+        pass
+
+    def recordLatency(self, seconds):
+        self.latencies.append(seconds)
+
+    def close(self):
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            log.info("remote puzzles: %d games, p50 %.1fms to the first frame", len(latencies), latencies[len(latencies) // 2] * 1000)
+        if self.localStore is not None:
+            self.localStore.close()
+
+class RemoteScores(threading.Thread): # in place of Database, scores are queued and posted in batches
+    def __init__(self, url, client, timeout=5, batchSize=100, path=database.DB_PATH):
+        super().__init__(name="RemoteScores", daemon=True)
+        self.url = url
+        self.timeout = timeout
+        self.client = client # for reads, on the caller's thread
+        self.batchSize = batchSize
+        self.path = path # scores the server never got are kept in the local database
+        self.queue = queue.Queue() # ("add", row), ("wipe", None) or None to stop, same as ScoreWriter
+        self.unsent = [] # ("add", row) and ("wipe", None) items that failed to send, in order, sent again with the next batch
+        self.sent = 0
+        self.lastScores = {} # (limit, themeName) -> the rows the server last gave, shown while it's away
+        self.closed = False
+        self.start()
+
+    def run(self):
+        poster = ServiceClient(self.url, self.timeout) # its own connection, the reads use the other one
+        running = True
+        while running:
+            try:
+                batch = [self.queue.get(timeout=RETRY_SECONDS if self.unsent else None)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.batchSize:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.unsent += [item for item in batch if item]
+            try:
+                self.send(poster)
+            except SERVICE_ERRORS:
+                log.warning("couldn't send %d scores and wipes to %s, trying again in %ds", len(self.unsent), self.url, RETRY_SECONDS)
+            running = None not in batch
+            for _ in batch:
+                self.queue.task_done()
+        poster.close()
+        if self.unsent: # the game is closing and the server is still away
+            wipes = [idx for idx, item in enumerate(self.unsent) if item[0] == "wipe"]
+            if wipes:
+                log.warning("the shared leaderboard was never wiped, the server couldn't be reached")
+            rows = [row for _, row in self.unsent[wipes[-1] + 1 if wipes else 0:]] # scores from before a wipe would have gone with it
+            if rows:
+                conn = database.connect(self.path)
+                with conn:
+                    conn.executemany(database.INSERT_SCORE, rows)
+                conn.close()
+                log.warning("kept %d scores in the local database, the server couldn't be reached", len(rows))
+
+    def send(self, poster): # the unsent items in the order they were queued, each run of scores in one request
+        while self.unsent:
+            if self.unsent[0][0] == "wipe":
+                poster.request("DELETE", "/scores")
+                del self.unsent[0]
+                continue
+            count = next((idx for idx, item in enumerate(self.unsent) if item[0] == "wipe"), len(self.unsent))
+            rows = [row for _, row in self.unsent[:count]]
+            poster.request("POST", "/scores", {"scores": rows})
+            self.sent += len(rows)
+            del self.unsent[:count]
+
+    def submitScore(self, username, themeName, timeMs, puzzleKey=None): # returns straight away
+        self.queue.put(("add", [username, themeName, int(timeMs), puzzleKey]))
+
+    def wipeScores(self): # a wipe the server doesn't get is kept and sent again, in order with the scores
+        self.queue.put(("wipe", None))
+        self.flush()
+
+    def flush(self): # until everything queued so far has been sent, or failed to send
+        self.queue.join()
+
+    def topScores(self, limit=8, themeName=None): # not waiting for the sender, the server writes scores a moment after taking them anyway
+        query = {"limit": limit}
+        if themeName is not None:
+            query["theme"] = themeName
+        try:
+            rows = [tuple(row) for row in self.client.request("GET", "/scores?" + urlencode(query))["scores"]]
+        except SERVICE_ERRORS as error:
+            log.warning("couldn't fetch the scores, showing the last ones (%s)", error)
+            return self.lastScores.get((limit, themeName), [])
+        self.lastScores[(limit, themeName)] = rows
+        return rows
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.join()
+        self.client.close()
+
+def connectService(url, timeout=5): # (scores, themes, puzzles) talking to the server at url, or None if it can't be reached
+    client = ServiceClient(url, min(timeout, QUICK_TIMEOUT)) # the requests made on the game's thread
+    themes = RemoteThemes(url, client, timeout)
+    try:
+        themes.refresh() # the one request that waits the whole timeout, while the main menu is showing
+    except SERVICE_ERRORS as error:
+        log.warning("couldn't reach the puzzle server at %s (%s), using the local database", url, error)
+        client.close()
+        return None
+    return RemoteScores(url, client, timeout), themes, RemotePuzzles(client)
@@ -0,0 +1,25 @@
+# Colours and word limits shared by the game and the tools that make puzzles without it, such as exporter.py
+
+COLOURS = {
+    "WHITE": (255, 255, 255),
+    "BLACK": (0, 0, 0),
+    "BLUE": (0, 100, 255),
+    "DARK_BLUE": (0, 0, 120),
+    "GREEN": (0, 255, 0),
+    "DARK_GREEN": (0, 120, 0),
+    "RED": (255, 50, 50),
+    "DARK_RED": (120, 0, 0),
+    "YELLOW": (255, 255, 0),
+    "DARK_GRAY": (25, 25, 25),
+    "PASTEL_RED": (255, 173, 173),
+    "PASTEL_ORANGE": (255, 214, 165),
+    "PASTEL_YELLOW": (253, 255, 182),
+    "PASTEL_GREEN": (202, 255, 191),
+    "PASTEL_BLUE": (155, 246, 255), 
+    "PASTEL_PURPLE": (189, 178, 255),
+    "PASTEL_PINK": (255, 198, 255)
+} # declaring colours
+PASTELS = [x for x in COLOURS.keys() if x[:6] == "PASTEL"] # colours for highlighting cells, worked out once
+
+SAMPLE_WORDS = 20 # words drawn from the theme for each game, the generator chooses 5 of them
+MAX_WORD_LENGTH = 12 # longest word that still leaves the grid cells readable
@@ -0,0 +1,187 @@
+import queue
+import atexit
+import logging
+import threading
+import sqlite3 as sql
+
+# Leaderboard and theme storage. Times are stored as whole milliseconds so they sort as numbers,
+# and the schema is upgraded in place using SQLite's user_version
+
+DB_PATH = 'components/database.db'
+RETRY_SECONDS = 5 # how long items that failed to write wait before being written again
+
+log = logging.getLogger(__name__)
+
+# kept as constants so the connection's statement cache prepares each one only once
+INSERT_SCORE = "INSERT INTO Players(username, themeName, time, puzzleKey) VALUES (?, ?, ?, ?)"
+TOP_SCORES = "SELECT username, themeName, time, puzzleKey FROM Players ORDER BY time ASC LIMIT ?"
+TOP_THEME_SCORES = "SELECT username, themeName, time, puzzleKey FROM Players WHERE themeName = ? ORDER BY time ASC LIMIT ?"
+WIPE_SCORES = "DELETE FROM Players" # keeping the table and its indexes
+
+def parseTime(value): # milliseconds from either a stored number or an old "m:ss" string
+    if isinstance(value, (int, float)):
+        return int(value)
+    value = str(value).strip()
+    if ':' in value:
+        mins, secs = value.split(':', 1)
+        return int(mins) * 60000 + int(round(float(secs) * 1000))
+    return int(float(value)) if value else 0
+
+def formatTime(ms): # milliseconds -> "m:ss" for displaying
+    secs = int(ms) // 1000
+    return f"{secs // 60}:{secs % 60:02d}"
+
+def migrateV1(conn): # "m:ss" text times -> integer milliseconds, plus indexes for the top-N queries
+    conn.execute("CREATE TABLE IF NOT EXISTS Players ( id INTEGER PRIMARY KEY AUTOINCREMENT, username VARCHAR(20), themeName VARCHAR(40), time INTEGER )")
+    conn.execute("CREATE TABLE PlayersV1 ( id INTEGER PRIMARY KEY AUTOINCREMENT, username VARCHAR(20), themeName VARCHAR(40), time INTEGER NOT NULL )")
+    rows = conn.execute("SELECT id, username, themeName, time FROM Players").fetchall()
+    conn.executemany("INSERT INTO PlayersV1(id, username, themeName, time) VALUES (?, ?, ?, ?)", ((id, username, themeName, parseTime(time)) for id, username, themeName, time in rows))
+    conn.execute("DROP TABLE Players")
+    conn.execute("ALTER TABLE PlayersV1 RENAME TO Players")
+    conn.execute("CREATE INDEX playersThemeTime ON Players(themeName, time, username)") # covers the per-theme top-N
+    conn.execute("CREATE INDEX playersTime ON Players(time, username, themeName)") # covers the overall top-N
+
+def migrateV2(conn): # themes and their words, one row per word so adding a theme only writes that theme
+    conn.execute("CREATE TABLE Themes ( id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(40) NOT NULL UNIQUE )")
+    conn.execute("CREATE TABLE Words ( themeId INTEGER NOT NULL REFERENCES Themes(id), position INTEGER NOT NULL, word VARCHAR(40) NOT NULL, PRIMARY KEY (themeId, position) ) WITHOUT ROWID")
+
+def migrateV3(conn): # each word's length and its place among the theme's words of that length, so words can be sampled by length
+    conn.execute("CREATE TABLE WordsV3 ( themeId INTEGER NOT NULL REFERENCES Themes(id), position INTEGER NOT NULL, word VARCHAR(40) NOT NULL, length INTEGER NOT NULL, ordinal INTEGER NOT NULL, PRIMARY KEY (themeId, position) ) WITHOUT ROWID")
+    conn.execute("INSERT INTO WordsV3(themeId, position, word, length, ordinal) SELECT themeId, position, word, LENGTH(word), ROW_NUMBER() OVER (PARTITION BY themeId, LENGTH(word) ORDER BY position) - 1 FROM Words")
+    conn.execute("DROP TABLE Words")
+    conn.execute("ALTER TABLE WordsV3 RENAME TO Words")
+    conn.execute("CREATE INDEX wordsByLength ON Words(themeId, length, ordinal, word)") # (theme, length, ordinal) -> word in one lookup
+
+def migrateV4(conn): # which puzzle each score was set on, a version for each theme's words, and the puzzle cache
+    conn.execute("ALTER TABLE Players ADD COLUMN puzzleKey VARCHAR(32)") # NULL for scores from before puzzles were kept
+    conn.execute("DROP INDEX playersThemeTime")
+    conn.execute("DROP INDEX playersTime")
+    conn.execute("CREATE INDEX playersThemeTime ON Players(themeName, time, username, puzzleKey)") # still covering the top-N, key included
+    conn.execute("CREATE INDEX playersTime ON Players(time, username, themeName, puzzleKey)")
+    conn.execute("CREATE INDEX playersPuzzle ON Players(puzzleKey)") # puzzles with a score on them are never evicted
+    conn.execute("ALTER TABLE Themes ADD COLUMN version INTEGER NOT NULL DEFAULT 0") # goes up every time the theme's words are replaced
+    conn.execute("CREATE TABLE Puzzles ( key VARCHAR(32) PRIMARY KEY, themeName VARCHAR(40) NOT NULL, seed INTEGER NOT NULL, data BLOB NOT NULL, size INTEGER NOT NULL, lastUsed INTEGER NOT NULL )")
+    conn.execute("CREATE INDEX puzzlesLastUsed ON Puzzles(lastUsed, size)") # least recently used first, for eviction
+
+MIGRATIONS = [migrateV1, migrateV2, migrateV3, migrateV4] # MIGRATIONS[n] upgrades a database from version n to n + 1
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for idx in range(version, len(MIGRATIONS)):
+        conn.execute("BEGIN") # each step commits on its own, or not at all, table changes included
+        try:
+            MIGRATIONS[idx](conn)
+            conn.execute(f"PRAGMA user_version = {idx + 1}")
+        except:
+            conn.rollback()
+            raise
+        conn.commit()
+
+def connect(path=DB_PATH, synchronous="NORMAL", checkSameThread=True):
+    conn = sql.connect(path, check_same_thread=checkSameThread)
+    conn.execute("PRAGMA journal_mode = WAL") # readers and the writer thread don't block each other
+    conn.execute(f"PRAGMA synchronous = {synchronous}")
+    migrate(conn)
+    return conn
+
+def addScore(conn, username, themeName, timeMs, puzzleKey=None):
+    with conn:
+        conn.execute(INSERT_SCORE, (username, themeName, int(timeMs), puzzleKey))
+
+def topScores(conn, limit=8, themeName=None): # the fastest (username, themeName, timeMs, puzzleKey), overall or for one theme
+    if themeName is None:
+        return conn.execute(TOP_SCORES, (limit,)).fetchall()
+    return conn.execute(TOP_THEME_SCORES, (themeName, limit)).fetchall()
+
+def wipeScores(conn):
+    with conn:
+        conn.execute(WIPE_SCORES)
+
+class ScoreWriter(threading.Thread): # writes queued scores in the background, many per transaction
+    def __init__(self, path=DB_PATH, batchSize=1000):
+        super().__init__(name="ScoreWriter", daemon=True)
+        self.path = path
+        self.batchSize = batchSize # most writes committed in one transaction
+        self.queue = queue.Queue() # ("add", (username, themeName, timeMs, puzzleKey)), ("wipe", None) or None to stop
+        self.unwritten = [] # ("add", row) and ("wipe", None) items that failed to write, in order, written again with the next batch
+        self.written = 0
+        self.ready = threading.Event()
+
+    def run(self):
+        conn = connect(self.path, synchronous="FULL") # every commit is on disk before flush() returns
+        self.ready.set()
+        running = True
+        while running:
+            try:
+                batch = [self.queue.get(timeout=RETRY_SECONDS if self.unwritten else None)] # waiting for work, or to try the failed items again
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.batchSize:
+                try:
+                    batch.append(self.queue.get_nowait()) # taking everything else that is already queued
+                except queue.Empty:
+                    break
+            self.unwritten += [item for item in batch if item]
+            try:
+                self.write(conn, self.unwritten)
+                self.unwritten = []
+            except sql.OperationalError: # locked, busy or out of disk space, none of which has to last
+                log.warning("couldn't write %d scores and wipes, trying again in %ds", len(self.unwritten), RETRY_SECONDS, exc_info=True)
+            except sql.Error: # something in the batch can't ever be written, so each item goes in on its own
+                self.writeEach(conn)
+            running = None not in batch
+            for _ in batch:
+                self.queue.task_done()
+        if self.unwritten: # the game is closing and the database still can't be written
+            log.error("lost %d scores and wipes, the database couldn't be written", len(self.unwritten))
+        conn.close()
+
+    def write(self, conn, items): # in one transaction, all or nothing
+        with conn:
+            for kind, row in items:
+                if kind == "add":
+                    conn.execute(INSERT_SCORE, row)
+                elif kind == "wipe":
+                    conn.execute(WIPE_SCORES)
+        self.written += sum(kind == "add" for kind, _ in items)
+
+    def writeEach(self, conn): # dropping only the items that fail, keeping the rest in order when the database is away again
+        for idx, item in enumerate(self.unwritten):
+            try:
+                self.write(conn, [item])
+            except sql.OperationalError:
+                self.unwritten = self.unwritten[idx:]
+                return
+            except sql.Error:
+                log.exception("dropped %r, it can't be written", item)
+        self.unwritten = []
+
+class Database: # one long lived connection for reads, and a writer thread for scores
+    def __init__(self, path=DB_PATH):
+        self.conn = connect(path) # migrating before the writer opens its own connection
+        self.writer = ScoreWriter(path)
+        self.writer.start()
+        self.writer.ready.wait()
+        self.closed = False
+        atexit.register(self.close) # queued scores are written even if the game is closed straight after
+
+    def submitScore(self, username, themeName, timeMs, puzzleKey=None): # returns straight away, the write happens on the writer thread
+        self.writer.queue.put(("add", (username, themeName, int(timeMs), puzzleKey)))
+
+    def wipeScores(self):
+        self.writer.queue.put(("wipe", None)) # queued behind any scores still waiting, so none of them survive it
+        self.flush()
+
+    def flush(self): # waiting until everything queued so far is committed, or failed to be
+        self.writer.queue.join()
+
+    def topScores(self, limit=8, themeName=None): # not waiting for the writer, a score is committed long before anyone opens the leaderboard
+        return topScores(self.conn, limit, themeName)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.writer.queue.put(None)
+        self.writer.join()
+        self.conn.close()
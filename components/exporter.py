@@ -0,0 +1,251 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # never opens a window, even on a desktop
+import sys
+import time
+import zlib
+import struct
+import random
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pygame
+from fonts import getFont, textCache
+from board import lineCells
+from themeStore import ThemeStore
+from puzzleCache import startWorker, makeWorkerPuzzle
+import database
+from constants import COLOURS, PASTELS, SAMPLE_WORDS, MAX_WORD_LENGTH
+
+# Exporting lots of puzzles at once to PNG, plain text and PDF puzzle books, each with a matching answer key, without
+# opening a window. Worker processes generate and draw the puzzles, write the PNG and text files themselves, and hand
+# back the PDF pages, which are added to the books in order. Only a few puzzles are in flight at a time, so memory
+# stays flat however many are exported. Run from the repo root:
+#   python components/exporter.py --count 10000 --out export
+
+log = logging.getLogger(__name__)
+
+FORMATS = ("png", "txt", "pdf")
+IN_FLIGHT = 4 # puzzles queued per worker, enough to keep them busy without results piling up
+INK = COLOURS["BLACK"]
+PAPER = COLOURS["WHITE"]
+KEY_COLOURS = [COLOURS[name] for name in PASTELS] # the found word colours from the game, one per answer
+PNG_MARGIN = 40
+PNG_GRID = 800 # pixels the grid is drawn in, unless the cells would be too small or too big
+PNG_CELL_RANGE = (12, 48)
+PNG_TITLE = 50 # pixels for the title above the grid
+PNG_WORD_COLUMN = 220 # pixels per column of the word list
+PNG_WORD_ROW = 32
+PNG_LEVEL = 1 # zlib level, pygame.image.save takes 3x as long for files only 15% smaller
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842 # A4 in points
+PAGE_MARGIN = 40
+PAGE_WORD_COLUMNS = 4
+COURIER_WIDTH = 0.6 # every Courier letter is this many ems wide
+COURIER_CAPS = 0.57 # and its capitals are about this tall
+
+def answerCells(puzzle): # (x, y) -> colour index of every cell that is part of a word
+    cells = {}
+    for wordIdx, (start, end) in enumerate(puzzle.wordLocations):
+        for cell in lineCells(start, end):
+            cells[cell] = wordIdx % len(KEY_COLOURS)
+    return cells
+
+def wordList(puzzle): # the words to find, in the order a book lists them
+    return sorted(puzzle.cleanWords, key=str.lower)
+
+def renderSurface(puzzle, title, keyCells=None): # the puzzle drawn on an offscreen surface, with its answers coloured in when keyCells is given
+    grid, size = puzzle.grid, puzzle.getGridSize()
+    cellPixels = max(PNG_CELL_RANGE[0], min(PNG_GRID // size, PNG_CELL_RANGE[1]))
+    gridPixels = cellPixels * size
+    letterFont, textFont = getFont("Arial", int(cellPixels * 0.7)), getFont("Arial", 24)
+    words = wordList(puzzle)
+    columns = max(1, gridPixels // PNG_WORD_COLUMN)
+    top = PNG_MARGIN + PNG_TITLE # of the grid
+    wordsTop = top + gridPixels + PNG_MARGIN // 2
+    surface = pygame.Surface((max(gridPixels, PNG_WORD_COLUMN) + PNG_MARGIN * 2, wordsTop + -(-len(words) // columns) * PNG_WORD_ROW + PNG_MARGIN))
+    surface.fill(PAPER)
+    surface.blit(textCache.render(title, textFont, INK), (PNG_MARGIN, PNG_MARGIN))
+
+    for (x, y), colour in (keyCells or {}).items():
+        surface.fill(KEY_COLOURS[colour], (PNG_MARGIN + x * cellPixels, top + y * cellPixels, cellPixels, cellPixels))
+    letters = []
+    for x, column in enumerate(grid):
+        left = PNG_MARGIN + x * cellPixels
+        for y, char in enumerate(column):
+            glyph = textCache.render(char, letterFont, INK)
+            letters.append((glyph, (left + (cellPixels - glyph.get_width()) // 2, top + y * cellPixels + (cellPixels - glyph.get_height()) // 2)))
+    surface.blits(letters, doreturn=False) # every letter in one call
+    pygame.draw.rect(surface, INK, (PNG_MARGIN, top, gridPixels, gridPixels), 2)
+
+    for idx, word in enumerate(words):
+        surface.blit(textCache.render(word, textFont, INK), (PNG_MARGIN + (idx % columns) * PNG_WORD_COLUMN, wordsTop + (idx // columns) * PNG_WORD_ROW))
+    return surface
+
+def pngChunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def savePng(surface, path): # an 8 bit RGB PNG, written here rather than by pygame.image.save so the compression level can be chosen
+    width, height = surface.get_size()
+    pixels = pygame.image.tostring(surface, "RGB") # tobytes is only in pygame 2.1.3 and up
+    stride = width * 3
+    rows = b"".join(b"\0" + pixels[start:start + stride] for start in range(0, len(pixels), stride)) # each row starts with its filter type, 0 is none
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + pngChunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) + pngChunk(b"IDAT", zlib.compress(rows, PNG_LEVEL)) + pngChunk(b"IEND", b""))
+
+def renderText(puzzle, title, keyCells=None): # the grid as rows of letters, with every letter that isn't part of a word dotted out in the key
+    grid, size = puzzle.grid, puzzle.getGridSize()
+    rows = [" ".join(grid[x][y] if keyCells is None or (x, y) in keyCells else "." for x in range(size)) for y in range(size)]
+    return "\n".join([title, "", *rows, "", *wordList(puzzle)]) + "\n"
+
+def pdfString(text):
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+def pdfPage(puzzle, title, keyCells=None): # the drawing operators for one A4 page, compressed, PDF y goes up the page
+    grid, size = puzzle.grid, puzzle.getGridSize()
+    cell = (PAGE_WIDTH - PAGE_MARGIN * 2) / size
+    left, top = PAGE_MARGIN, PAGE_HEIGHT - PAGE_MARGIN - 36 # of the grid
+    ops = [f"BT /F2 16 Tf {PAGE_MARGIN} {PAGE_HEIGHT - PAGE_MARGIN - 16} Td {pdfString(title)} Tj ET"]
+
+    for (x, y), colour in (keyCells or {}).items():
+        red, green, blue = KEY_COLOURS[colour]
+        ops.append(f"{red / 255:.3f} {green / 255:.3f} {blue / 255:.3f} rg {left + x * cell:.2f} {top - (y + 1) * cell:.2f} {cell:.2f} {cell:.2f} re f")
+    ops.append(f"0 g 1 w {left:.2f} {top - size * cell:.2f} {size * cell:.2f} {size * cell:.2f} re S")
+
+    fontSize = cell * 0.7
+    ops.append(f"BT /F1 {fontSize:.2f} Tf {cell - COURIER_WIDTH * fontSize:.3f} Tc") # the spacing makes each letter take exactly one cell, so a row is one string
+    ops.append(f"{left + (cell - COURIER_WIDTH * fontSize) / 2:.2f} {top - (cell + COURIER_CAPS * fontSize) / 2:.2f} Td")
+    for y in range(size):
+        if y:
+            ops.append(f"0 {-cell:.3f} Td") # down a row
+        ops.append(pdfString("".join(grid[x][y] for x in range(size))) + " Tj")
+    ops.append("ET")
+
+    columnWidth = (PAGE_WIDTH - PAGE_MARGIN * 2) / PAGE_WORD_COLUMNS
+    ops.append("BT /F2 11 Tf")
+    for idx, word in enumerate(wordList(puzzle)):
+        ops.append(f"1 0 0 1 {left + (idx % PAGE_WORD_COLUMNS) * columnWidth:.2f} {top - size * cell - 24 - (idx // PAGE_WORD_COLUMNS) * 16:.2f} Tm {pdfString(word)} Tj")
+    ops.append("ET")
+    return zlib.compress("\n".join(ops).encode("cp1252", "replace"))
+
+class PdfWriter: # a PDF written a page at a time, only the offsets of what's been written are kept until it's closed
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.offsets = {} # object number -> where it starts in the file
+        self.pageIds = []
+        self.nextId = 5 # 1 is the catalog, 2 the page tree, 3 and 4 the fonts, all written by close
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def writeObject(self, objId, body):
+        self.offsets[objId] = self.file.tell()
+        self.file.write(b"%d 0 obj\n%s\nendobj\n" % (objId, body))
+
+    def addPage(self, content): # content from pdfPage
+        contentId, pageId = self.nextId, self.nextId + 1
+        self.nextId += 2
+        self.writeObject(contentId, b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(content), content))
+        self.writeObject(pageId, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>" % (PAGE_WIDTH, PAGE_HEIGHT, contentId))
+        self.pageIds.append(pageId)
+
+    def close(self):
+        self.writeObject(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier-Bold /Encoding /WinAnsiEncoding >>") # standard fonts, so nothing is embedded
+        self.writeObject(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self.writeObject(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % pageId for pageId in self.pageIds), len(self.pageIds)))
+        self.writeObject(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.file.tell()
+        self.file.write(b"xref\n0 %d\n0000000000 65535 f \n" % self.nextId)
+        self.file.write(b"".join(b"%010d 00000 n \n" % self.offsets[objId] for objId in range(1, self.nextId)))
+        self.file.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self.nextId, xref))
+        self.file.close()
+
+def exportPuzzle(job): # generating and writing one puzzle, returns (number, made, (puzzle page, key page) or None)
+    number, theme, seed, size, outDir, formats = job
+    try:
+        puzzle = makeWorkerPuzzle(theme, seed, SAMPLE_WORDS, MAX_WORD_LENGTH, size) # the same puzzle the game makes from this seed
+    except ValueError as error:
+        log.warning("skipped puzzle %d (%s, seed %d): %s", number, theme, seed, error)
+        return number, False, None
+    title = f"Puzzle {number}: {theme}"
+    keyCells = answerCells(puzzle)
+    name = f"{number:05d}"
+
+    if "png" in formats:
+        savePng(renderSurface(puzzle, title), os.path.join(outDir, "png", name + ".png"))
+        savePng(renderSurface(puzzle, title + " (answers)", keyCells), os.path.join(outDir, "png", name + "-key.png"))
+    if "txt" in formats:
+        with open(os.path.join(outDir, "txt", name + ".txt"), "w", encoding="utf-8") as f:
+            f.write(renderText(puzzle, title))
+        with open(os.path.join(outDir, "txt", name + "-key.txt"), "w", encoding="utf-8") as f:
+            f.write(renderText(puzzle, title + " (answers)", keyCells))
+    if "pdf" in formats:
+        return number, True, (pdfPage(puzzle, title), pdfPage(puzzle, title + " (answers)", keyCells))
+    return number, True, None
+
+def runJobs(jobs, workers, path=database.DB_PATH): # the results of exportPuzzle in job order, with only a few jobs in flight at a time
+    if workers == 1: # no point starting a pool for one worker
+        startWorker(path)
+        for job in jobs:
+            yield exportPuzzle(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=startWorker, initargs=(path,)) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(exportPuzzle, job))
+            if len(pending) >= workers * IN_FLIGHT:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def export(count, outDir, themes=None, seed=None, size=None, formats=FORMATS, workers=None, path=database.DB_PATH): # returns the stats printed at the end
+    store = ThemeStore(path) # imports themes.json if this is the first run
+    names = store.getNames()
+    store.close() # before the workers start, they open their own
+    themes = themes or names
+    unknown = [theme for theme in themes if theme not in names]
+    if unknown:
+        raise ValueError(f"no such theme: {', '.join(unknown)}")
+    workers = workers or os.cpu_count()
+    seed = random.randrange(2**32) if seed is None else seed
+    seedRng = random.Random(seed) # each puzzle gets its own seed, derived from the batch seed, same as generateMany
+    jobs = ((number, themes[(number - 1) % len(themes)], seedRng.randrange(2**32), size, outDir, formats) for number in range(1, count + 1))
+
+    os.makedirs(outDir, exist_ok=True)
+    for folder in ("png", "txt"):
+        if folder in formats:
+            os.makedirs(os.path.join(outDir, folder), exist_ok=True)
+    books = [PdfWriter(os.path.join(outDir, "puzzles.pdf")), PdfWriter(os.path.join(outDir, "answers.pdf"))] if "pdf" in formats else []
+
+    start = time.perf_counter()
+    made = 0
+    for number, ok, pages in runJobs(jobs, workers, path):
+        made += ok
+        for book, page in zip(books, pages or ()):
+            book.addPage(page) # straight to disk, in puzzle order
+        if number % 1000 == 0:
+            log.info("%d / %d puzzles, %.1f per second", number, count, number / (time.perf_counter() - start))
+    for book in books:
+        book.close()
+    elapsed = time.perf_counter() - start
+
+    pages = made * 2 # each puzzle and its key
+    return {"puzzles": made, "skipped": count - made, "seed": seed, "workers": workers, "seconds": elapsed, "pagesPerSec": pages / elapsed, "formats": list(formats)}
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="export puzzles and their answer keys without opening a window")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--out", default="export")
+    parser.add_argument("--theme", action="append", dest="themes", help="can be given more than once, every theme by default")
+    parser.add_argument("--seed", type=int, default=None, help="the same seed exports the same puzzles")
+    parser.add_argument("--size", type=int, default=None, help="grid size, sized to the words by default")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--db", default=database.DB_PATH, help="the database the themes are read from")
+    args = parser.parse_args()
+
+    try:
+        stats = export(args.count, args.out, args.themes, args.seed, args.size, args.formats, args.workers, args.db)
+    except ValueError as error:
+        sys.exit(str(error))
+    print(f"exported {stats['puzzles']} puzzles and their keys as {', '.join(stats['formats'])} to {args.out} in {stats['seconds']:.1f} s")
+    print(f"  {stats['pagesPerSec']:.1f} pages / sec with {stats['workers']} workers, seed {stats['seed']}" + (f", {stats['skipped']} skipped" if stats['skipped'] else ""))
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+import pygame
+
+# One font object per (family, size) for the whole process, and an LRU cache of rendered text surfaces
+
+_fonts = {}
+
+def getFont(family, size): # SysFont lookups are slow, so each (family, size) is only looked up once
+    key = (family, size)
+    if key not in _fonts:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        _fonts[key] = pygame.font.SysFont(family, size)
+    return _fonts[key]
+
+class TextCache:
+    def __init__(self, maxBytes=8 * 1024 * 1024):
+        self.maxBytes = maxBytes # memory cap for the cached surfaces
+        self.usedBytes = 0
+        self.surfaces = OrderedDict() # (text, font, colour) -> surface, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def setMaxBytes(self, maxBytes):
+        self.maxBytes = maxBytes
+        self.evict()
+
+    def render(self, text, font, colour): # same as font.render(text, True, colour) but only renders each combination once
+        key = (text, font, tuple(colour))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key) # most recently used
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, colour)
+        self.surfaces[key] = surface
+        self.usedBytes += surfaceBytes(surface)
+        self.evict()
+        return surface
+
+    def evict(self): # dropping the least recently used surfaces until under the cap
+        while self.usedBytes > self.maxBytes and len(self.surfaces) > 1:
+            _, surface = self.surfaces.popitem(last=False)
+            self.usedBytes -= surfaceBytes(surface)
+
+    def clear(self):
+        self.surfaces.clear()
+        self.usedBytes = 0
+
+    def getStats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.surfaces), "bytes": self.usedBytes}
+
+def surfaceBytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+textCache = TextCache() # shared by every widget
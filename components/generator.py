@@ -0,0 +1,178 @@
+import time
+import random
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from grid import Grid, DIRECTIONS
+from verifier import ensureUnique
+
+# Puzzle generation that doesn't touch pygame, so it can run in worker processes / services without starting SDL
+
+log = logging.getLogger(__name__)
+GROW_ATTEMPTS = 3 # how many times the grid is grown by 1 when the words don't fit
+VERIFY_ATTEMPTS = 5 # how many fresh placements are tried when the placed words spell an extra copy
+
+class Puzzle:
+    def __init__(self, cells, words, wordLocations, cleanWords, seed=None):
+        self.cells = cells # the Grid the words were placed in
+        self.words = words # the words as they were written into the grid (uppercase, possibly backwards)
+        self.wordLocations = wordLocations # [[startX, startY], [endX, endY]] for each word, same order as words
+        self.cleanWords = cleanWords # the words as they should be displayed to the player, same order as words
+        self.seed = seed # the seed the puzzle was generated from
+        self.key = None # its key in the puzzle cache, once it has been stored there
+
+    @property
+    def grid(self): # grid[x][y] of single uppercase characters, as playMenu expects
+        return self.cells.toRows()
+
+    def getGridSize(self):
+        return self.cells.size
+
+    def toDict(self): # plain data so the puzzle can be pickled / sent anywhere
+        return {
+            "grid": self.grid,
+            "words": self.words,
+            "wordLocations": self.wordLocations,
+            "cleanWords": self.cleanWords,
+            "seed": self.seed,
+        }
+
+    @classmethod
+    def fromDict(cls, data):
+        return cls(Grid.fromRows(data["grid"]), data["words"], data["wordLocations"], data["cleanWords"], seed=data.get("seed"))
+
+def overlapsChosen(word, chosen): # whether a word contains, or is contained in, an already chosen word (either way round)
+    word = word.upper()
+    for other in chosen:
+        if word in other or word[::-1] in other or other in word or other[::-1] in word:
+            return True
+    return False
+
+def pickWords(wordList, rng, numWords=5): # picking the words for the grid, and whether they are written backwards
+    data = list(wordList) # copying so the callers list isn't changed
+    words = []
+    cleanWords = []
+
+    while len(words) < numWords and data: # Picking random words
+        wordIdx = rng.randint(0, len(data)-1) # Getting a random index for a word
+        if overlapsChosen(data[wordIdx], words):
+            data.pop(wordIdx) # a word inside another word (or the other way round) can never appear exactly once
+            continue
+        backward = rng.randint(0, 2) # Generating whether the word will be forwards or backwards
+        cleanWords.append(data[wordIdx])
+        if backward <= 1:
+            words.append(data[wordIdx].upper())
+        else:
+            words.append(data[wordIdx][::-1].upper()) # backwards
+        data.pop(wordIdx) # Removing the word from the available list
+
+    return words, cleanWords
+
+def generatePuzzle(wordList, seed=None, size=None, numWords=5, timeBudget=0.25, diagonals=True): # builds a full puzzle from a theme's word list
+    if seed is None:
+        seed = random.randrange(2**32) # picking a seed so the puzzle can still be reproduced
+    rng = random.Random(seed)
+    npRng = np.random.default_rng(seed)
+
+    words, cleanWords = pickWords(wordList, rng, numWords)
+    if not words:
+        raise ValueError("the theme has no words to place")
+    order = sorted(range(len(words)), key=lambda i: len(words[i]), reverse=True) # longest words first, keeping words and cleanWords lined up
+    words = [words[i] for i in order]
+    cleanWords = [cleanWords[i] for i in order]
+
+    gridSize = size if size else max(len(word) for word in words) + 3 # longest word plus 3, same as before
+
+    attemptsLeft = 1 if size else GROW_ATTEMPTS # a fixed size is never grown
+    verifyAttemptsLeft = VERIFY_ATTEMPTS
+    while True:
+        grid = Grid(gridSize) # empty grid
+        wordLocations = placeWords(grid, words, npRng, timeBudget=timeBudget) # generating grid and word locations
+        if wordLocations is not None:
+            grid.fill(npRng) # filling the gaps in the grid
+            if ensureUnique(grid, words, wordLocations, npRng, diagonals=diagonals): # making sure the filler didn't spell any word again
+                break
+            verifyAttemptsLeft -= 1
+            if verifyAttemptsLeft == 0:
+                raise ValueError(f"couldn't make each word appear exactly once on a {gridSize}x{gridSize} grid")
+            continue # the placed words spell another copy between them, so place them again
+        attemptsLeft -= 1
+        if attemptsLeft == 0:
+            raise ValueError(f"couldn't place {len(words)} words on a {gridSize}x{gridSize} grid")
+        gridSize += 1 # the words didn't fit, so try a bigger grid
+
+    return Puzzle(grid, words, wordLocations, cleanWords, seed=seed)
+
+def candidateLocation(word, candidate): # [[startX, startY], [endX, endY]] for a placed word
+    x, y, dIdx = (int(value) for value in candidate)
+    dx, dy = DIRECTIONS[dIdx]
+    return [[x, y], [x + dx * (len(word) - 1), y + dy * (len(word) - 1)]]
+
+def placeWords(grid, words, npRng, timeBudget=0.25): # backtracking placer, returns the word locations or None if it runs out of options / time
+    startTime = time.perf_counter()
+    deadline = startTime + timeBudget
+    attempts = [0] * len(words) # how many spots each word was tried in
+    remaining = list(range(len(words)))
+    stack = [] # [wordIdx, candidates, current candidate index] for every placed word, in placement order
+
+    while remaining:
+        if time.perf_counter() > deadline:
+            log.debug("placement timed out after %.1fms on a %dx%d grid, attempts=%s", (time.perf_counter() - startTime) * 1000, grid.size, grid.size, attempts)
+            return None
+
+        best, bestCount, counts = None, None, {}
+        sums = grid.emptySums() # shared by every count this step
+        for wordIdx in remaining: # picking the most constrained word (fewest places it can go)
+            length = len(words[wordIdx])
+            if length not in counts: # words of the same length fit in the same places
+                counts[length] = grid.countCandidates(length, sums)
+            if best is None or counts[length] < bestCount:
+                best, bestCount = wordIdx, counts[length]
+            if bestCount == 0:
+                break
+
+        if bestCount: # placing it in its first (shuffled) spot
+            bestCandidates = grid.candidates(len(words[best]), sums)
+            bestCandidates = bestCandidates[npRng.permutation(len(bestCandidates))] # shuffled in one go
+            remaining.remove(best)
+            stack.append([best, bestCandidates, 0])
+            grid.write(words[best], bestCandidates[0])
+            attempts[best] += 1
+            continue
+
+        while stack: # a word can't go anywhere, so move the last placed word to its next spot
+            frame = stack[-1]
+            grid.erase(words[frame[0]], frame[1][frame[2]])
+            frame[2] += 1
+            if frame[2] < len(frame[1]):
+                grid.write(words[frame[0]], frame[1][frame[2]])
+                attempts[frame[0]] += 1
+                break
+            stack.pop() # out of spots for this word too, keep going back
+            remaining.append(frame[0])
+        else:
+            log.debug("no placement exists on a %dx%d grid, attempts=%s", grid.size, grid.size, attempts)
+            return None
+
+    wordLocations = [None] * len(words)
+    for wordIdx, candidates, candidateIdx in stack:
+        wordLocations[wordIdx] = candidateLocation(words[wordIdx], candidates[candidateIdx])
+
+    log.debug("placed %d words on a %dx%d grid in %.2fms, attempts=%s", len(words), grid.size, grid.size, (time.perf_counter() - startTime) * 1000, attempts)
+    return wordLocations
+
+def _generateFromArgs(args): # top level so the process pool can pickle it
+    wordList, seed, size, numWords = args
+    return generatePuzzle(wordList, seed=seed, size=size, numWords=numWords)
+
+def generateMany(n, wordList, workers=None, seed=None, size=None, numWords=5, chunksize=64): # generating lots of puzzles across every core
+    if seed is None:
+        seed = random.randrange(2**32)
+    seedRng = random.Random(seed) # each puzzle gets its own seed, derived from the batch seed
+    jobs = [(wordList, seedRng.randrange(2**32), size, numWords) for _ in range(n)]
+
+    if workers == 1: # no point starting a pool for one worker
+        return [_generateFromArgs(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_generateFromArgs, jobs, chunksize=chunksize))
@@ -0,0 +1,67 @@
+import numpy as np
+
+# Compact wordsearch grid backed by a uint8 array, 0 = empty cell, otherwise the character code
+
+EMPTY = 0
+A, Z = ord('A'), ord('Z')
+DIRECTIONS = [[1, 0], [0, 1]] # vertical (along x), horizontal (along y)
+
+def encodeWord(word): # word -> uint8 array of character codes
+    return np.frombuffer(word.encode("latin-1", "replace"), dtype=np.uint8) # characters outside latin-1 become '?'
+
+class Grid:
+    def __init__(self, size, cells=None):
+        self.size = size
+        self.cells = cells if cells is not None else np.zeros((size, size), dtype=np.uint8) # cells[x, y]
+
+    @classmethod
+    def fromRows(cls, rows): # rows as used by playMenu, grid[x][y] of single characters
+        cells = np.array([[ord(char) if char else EMPTY for char in row] for row in rows], dtype=np.uint8)
+        return cls(len(rows), cells)
+
+    def toRows(self): # back to the nested lists playMenu expects
+        return [list(row.tobytes().decode("latin-1")) for row in self.cells]
+
+    def emptySums(self): # running count of empty cells along x and along y, padded with a leading 0
+        empty = self.cells == EMPTY
+        sums = (np.zeros((self.size + 1, self.size), dtype=np.int32), np.zeros((self.size, self.size + 1), dtype=np.int32))
+        np.cumsum(empty, axis=0, out=sums[0][1:])
+        np.cumsum(empty, axis=1, out=sums[1][:, 1:])
+        return sums
+
+    def fitMask(self, length, dIdx, sums): # boolean array of every start where `length` empty cells follow in the direction
+        if dIdx == 0:
+            return (sums[0][length:] - sums[0][:-length]) == length # window sums along x
+        return (sums[1][:, length:] - sums[1][:, :-length]) == length # window sums along y
+
+    def countCandidates(self, length, sums=None): # how many spots a word of this length fits in
+        if length > self.size:
+            return 0
+        sums = sums if sums is not None else self.emptySums()
+        return sum(int(np.count_nonzero(self.fitMask(length, dIdx, sums))) for dIdx in range(len(DIRECTIONS)))
+
+    def candidates(self, length, sums=None): # (n, 3) array of every x, y, direction a word of this length fits in without hitting another word
+        if length > self.size:
+            return np.zeros((0, 3), dtype=np.int32)
+        sums = sums if sums is not None else self.emptySums()
+        found = []
+        for dIdx in range(len(DIRECTIONS)):
+            xs, ys = np.nonzero(self.fitMask(length, dIdx, sums))
+            found.append(np.stack([xs, ys, np.full(len(xs), dIdx)], axis=1))
+        return np.concatenate(found).astype(np.int32)
+
+    def cellSlice(self, length, candidate): # the slice of cells a word covers
+        x, y, dIdx = (int(value) for value in candidate)
+        if dIdx == 0:
+            return np.s_[x:x + length, y]
+        return np.s_[x, y:y + length]
+
+    def write(self, word, candidate): # writing a word into the grid in one slice assignment
+        self.cells[self.cellSlice(len(word), candidate)] = encodeWord(word)
+
+    def erase(self, word, candidate):
+        self.cells[self.cellSlice(len(word), candidate)] = EMPTY
+
+    def fill(self, npRng): # filling every empty cell with a random letter in one draw
+        mask = self.cells == EMPTY
+        self.cells[mask] = npRng.integers(A, Z + 1, size=int(np.count_nonzero(mask)), dtype=np.uint8)
@@ -1,15 +1,26 @@
+import time
+startupStart = time.perf_counter() # before the slow imports, for --startup-profile
 import os
 import sys
+import shutil
+import tempfile
 import json
-import time
 import random
-import sqlite3 as sql
-import string
+import logging
 import pygame
-import tabulate
+from fonts import getFont, textCache
+from renderer import Renderer, getStaticLayer, clearStaticLayers
+from spatial import SpatialIndex
+from viewport import Viewport
+from board import Board, lineCells
+from scenes import Scene, SceneManager
+from profiling import PhaseTimer, Instruments, CpuMeter
+import database
+from themeStore import ThemeStore
+from constants import COLOURS, PASTELS, SAMPLE_WORDS, MAX_WORD_LENGTH
 
-pygame.init() # initialising the pygame module 
 basedir = os.path.join(os.path.abspath(__file__))
+log = logging.getLogger(__name__)
 
 class Button:
     def __init__(self, colour=(0, 0, 0), tColour=(255, 255, 255), func=None, geo=[0, 0, 0, 0], text="", params=[], fontSize=15, hasReturn=False, hasFunc=False): # Geo = {x, y, w, h}
@@ -17,7 +28,10 @@ class Button:
         self.geo = geo # Position of the button
         self.colour = colour # Button Colour
         self.tColour = tColour # Text Colour
-        self.font = pygame.font.SysFont("Arial", fontSize)
+        self.font = getFont("Arial", fontSize) # shared font object
+        self.drawnText = None # rendered text, only re-rendered when the text or its colour changes
+        self.dirty = True # whether the button needs redrawing
+        self.drawnRect = None # the area it was last drawn in
         self.params = params
         self.hasReturn = hasReturn
         self.hasFunc = hasFunc
@@ -38,18 +52,33 @@ class Button:
         return self.hasFunc
 
     def setText(self, newText): # changing displayed text
-        self.text = newText
+        if newText != self.text:
+            self.text = newText
+            self.drawnText = None
+            self.dirty = True
  
     def updateTextColour(self, newColour): # updating the colour of the text
-        self.tColour = newColour
+        if newColour != self.tColour:
+            self.tColour = newColour
+            self.drawnText = None
+            self.dirty = True
 
     def updateColour(self, newColour): # updating the background colour of the button
-        self.colour = newColour
+        if newColour != self.colour:
+            self.colour = newColour
+            self.dirty = True
+
+    def getDrawnText(self):
+        if self.drawnText is None:
+            self.drawnText = textCache.render(self.text, self.font, self.tColour) # draw the text
+        return self.drawnText
+
+    def getRect(self): # the box plus any text that hangs off the end of it
+        return pygame.Rect(self.geo).union(self.getDrawnText().get_rect(topleft=(self.geo[0] + 5, self.geo[1] + 5)))
 
     def draw(self): 
         pygame.draw.rect(window, self.colour, self.geo) # draw the box
-        drawnText = self.font.render(self.text, True, self.tColour) # draw the text
-        window.blit(drawnText, pygame.math.Vector2(self.geo[0] + 5, self.geo[1] + 5)) # draw to screen
+        window.blit(self.getDrawnText(), pygame.math.Vector2(self.geo[0] + 5, self.geo[1] + 5)) # draw to screen
     
     def callFunc(self, mouse):
         if self.geo[0] < mouse[0] < self.geo[0] + self.geo[2] and self.geo[1] < mouse[1] < self.geo[1] + self.geo[3]: # Checking if the mouse is within the boundaries
@@ -59,40 +88,6 @@ class Button:
         if self.geo[0] < mouse[0] < self.geo[0] + self.geo[2] and self.geo[1] < mouse[1] < self.geo[1] + self.geo[3]: # Checking if the mouse is within the boundaries
             return self.func
 
-class GridCell:
-    def __init__(self, colour=(255, 255, 255), tColour=(0, 0, 0), geo=[0, 0, 0, 0], char='', gridPos=(0, 0)):
-        self.colour = colour # the colour of the background (default is white)
-        self.tColour = tColour # the colour of the text
-        self.geo = geo # XYWH
-        self.text = char # the character that will be drawn
-        self.font = pygame.font.SysFont("Arial", 30) # the font for the characters in the cell
-        self.gridPos = gridPos
-        self.finalColour = (0, 255, 0)
-        self.isFinished = False
-    
-    def draw(self): 
-        pygame.draw.rect(window, self.colour if not self.isFinished else self.finalColour, self.geo)
-        drawnText = self.font.render(self.text, True, self.tColour)
-        window.blit(drawnText, pygame.math.Vector2(self.geo[0] + 5, self.geo[1] + 5)) # drawing the characters to the screen at the same position as the background + 5 to center them a bit more
-
-    def update(self, colour):
-        self.colour = colour # update the colour of the cell
-
-    def setFinished(self):
-        self.isFinished = True # lock the cells colour
-    
-    def setFinalColour(self, newColour):
-        self.finalColour = newColour
-
-    def onClick(self, mouse, colour=(0, 255, 0)):
-        if self.geo[0] < mouse[0] < self.geo[0] + self.geo[2] and self.geo[1] < mouse[1] < self.geo[1] + self.geo[3]:
-            self.colour = colour    
-            return self.gridPos # return the grid position when clicked
-        else: return None 
-
-    def getGridPos(self):
-        return self.gridPos # return the grid pos
-
 class InputBox:
     def __init__(self, geo=[0, 0, 0, 0], colour=(255, 255, 255), tColour=(0, 0, 0), borderColour=(0, 0, 0), borderThickness=3, placeholderText=None):
         self.geo = geo # dimensions (x, y, w, h)
@@ -100,7 +95,11 @@ class InputBox:
         self.tColour = tColour # colour of the text
         self.borderColour = borderColour # colour of the border
         self.borderThickness = borderThickness # thickness of the border surrounding the box
-        self.font = pygame.font.SysFont("Arial", 20) # font of the text displayed
+        self.font = getFont("Arial", 20) # font of the text displayed
+        self.drawnText = None
+        self.drawnKey = None # the (text, colour) drawnText was rendered from
+        self.dirty = True
+        self.drawnRect = None
         if placeholderText: self.placeholderText = placeholderText # placeholder text if there is any
         self.focused = False # state of the box
         self.text = '' # the users text
@@ -110,26 +109,38 @@ class InputBox:
 
     def unfocus(self):
         self.focused = False # unfocus the window
+        self.dirty = True
 
     def getText(self):
         return self.text # return the users text
 
-    def draw(self):
-        pygame.draw.rect(window, self.borderColour, [
+    def getBorderRect(self):
+        return pygame.Rect(
             self.geo[0] - self.borderThickness,
             self.geo[1] - self.borderThickness,
             self.geo[2] + self.borderThickness * 2,
             self.geo[3] + self.borderThickness * 2,
-        ]) # drawing input box border
-        pygame.draw.rect(window, self.colour, self.geo) # drawing input box
+        )
 
+    def getDrawnText(self):
         if not self.focused and len(self.text) == 0: # deciding whether or not to display placeholder text
             placeholderConditions = True
         else:
             placeholderConditions = False
 
-        drawnText = self.font.render(self.text if not placeholderConditions else self.placeholderText, True, self.tColour) # writing the text
-        window.blit(drawnText, pygame.math.Vector2(self.geo[0], self.geo[1])) # writing to screen
+        drawnKey = (self.text if not placeholderConditions else self.placeholderText, self.tColour)
+        if drawnKey != self.drawnKey: # only re-rendering when the text changes
+            self.drawnText = textCache.render(drawnKey[0], self.font, self.tColour) # writing the text
+            self.drawnKey = drawnKey
+        return self.drawnText
+
+    def getRect(self):
+        return self.getBorderRect().union(self.getDrawnText().get_rect(topleft=(self.geo[0], self.geo[1])))
+
+    def draw(self):
+        pygame.draw.rect(window, self.borderColour, self.getBorderRect()) # drawing input box border
+        pygame.draw.rect(window, self.colour, self.geo) # drawing input box
+        window.blit(self.getDrawnText(), pygame.math.Vector2(self.geo[0], self.geo[1])) # writing to screen
     
     def focus(self, mouse, inputBoxes):
         if self.geo[0] < mouse[0] < self.geo[0] + self.geo[2] and self.geo[1] < mouse[1] < self.geo[1] + self.geo[3]: # if the user clicks inside the input box
@@ -137,9 +148,11 @@ class InputBox:
                 if ipb.getFocused():
                     ipb.unfocus() # unfocusing all other input boxes
             self.focused = not self.focused # toggling the focus of the current box
+            self.dirty = True
 
     def writeToText(self, char):
         if self.focused: # if the current box is focused
+            self.dirty = True
             if char == '\x1B': # if user clicks "Escape" exit focus
                 self.focused = False
                 return
@@ -152,478 +165,563 @@ class InputBox:
             self.text += char # add character to text string
             return
 
-def mainMenu(COLOUR_SCHEME): # Main Menu Loop
-    mButtons = []
-    pygame.display.set_caption("Main Menu") # Settings the title of the game window
-    mButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=themeChoice, geo=[
-        int(WIDTH / 2 - 50), int(HEIGHT / 2 - 25), 100, 50], text="Play Menu", params=[COLOUR_SCHEME])) # adding a play button
-    mButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=leaderboardMenu, geo=[
-        int(WIDTH / 2 - 50), int(HEIGHT / 2 + 25), 100, 50], text="Leaderboard", params=[COLOUR_SCHEME])) # Adding a leaderboard button
-    mButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=settingsMenu, geo=[
-        int(WIDTH / 2 - 50), int(HEIGHT / 2 + 75), 100, 50], text="Settings Menu", params=[COLOUR_SCHEME])) # adding a settings button
-
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT: # allowing the user to quit the window
-                quit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse = pygame.mouse.get_pos()
-                for button in mButtons:
-                    if button.getHasFunc():
-                        button.callFunc(mouse)
-        
-        window.fill(COLOURS[COLOUR_SCHEME[0]['background']]) # refreshing the screen
-        for x in mButtons:
-            x.draw() # drawing the buttons to screen
-
-        pygame.display.flip() # refreshing the display
-        clock.tick(FPS)
-
-def playMenu(grid, words, wordCoords, cleanWords, themeName, COLOUR_SCHEME): # Game Menu Loop
-    # cleanWords is so that I can display the words the user is to find, as they are flipped backwards on generation.
-    startTime = time.time()
-    pButtons = []
-    pygame.display.set_caption("Play Menu") # Changing the caption of the window
-    pButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=mainMenu, geo=[WIDTH - 100, 0, 100, 50], text="Main Menu", params=[COLOUR_SCHEME])) # Adding a button to fall back to the main menu
-    pButtons.append(timeDisp := Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[WIDTH - 100, 50, 100, 50], text="Time: "))
-
-    # declaring variables
-
-    words = sorted(words, key=len, reverse=True)
-    cleanWords = sorted(cleanWords, key=len, reverse=True)
-
-    gridSize = len(grid)
-    screenCenter = ( WIDTH / 2, HEIGHT / 2 ) # getting the very middle of the screen
-    cellSize = (
-        (screenCenter[0] / gridSize) / 1.2,
-        (screenCenter[1] / gridSize) * 1.75
-    ) # generating the size of the cells
-    numSelected = 0
-    cleanWordsCopy = cleanWords
-    selected = [[], []]
-    completedWordCoords = []
-    wordDisplay = []
-    foundWords = []
-
-    cells = [] # creating an array for cell objects
-    for x in range(0, gridSize): # creating it the same size as the original grid
-        cells.append([]) 
-        for y in range(0, gridSize): 
-            cells[x].append(GridCell(
-                colour=COLOURS[COLOUR_SCHEME[0]['background']],
-                tColour=COLOURS[COLOUR_SCHEME[0]['text']],
-                geo=[50 + cellSize[0] * (x), 50 + cellSize[1] * (y), cellSize[0]+5, cellSize[1]-4], 
-                char=grid[x][y],
-                gridPos=[x, y]
-            )) # adding GridCell objects to another grid array
- 
-    for i in range(-2, 3):
-        wordDisplay.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[(screenCenter[0] + (WIDTH / 4)) - 50, screenCenter[1] - (100 * i), 100, 50], text=cleanWords[i+2], fontSize=30))
-
-    while True: # Beginning a loop for the game
-        for event in pygame.event.get(): # getting everything that is happening
-            if event.type == pygame.QUIT:
-                quit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                for button in pButtons:
-                    if button.getHasFunc():
-                        button.callFunc(pygame.mouse.get_pos()) # Calling the functions associated with buttons
-
-                for row in cells: # for every row in the cells array
-                    for cell in row:  # for every item in each row
-                        cellPos = cell.onClick(pygame.mouse.get_pos(), colour=COLOURS[random.choice([x for x in COLOURS.keys() if x[:6] == "PASTEL"])]) # returns None or a position in the grid
-
-                        if cellPos != None: # If it returns a position
-                            if numSelected == 0: # if the current number selected is 0
-                                selected[0] = cellPos # setting the first item in "Selected" to the current position
-                                numSelected += 1 # incremeting the num selected
-                            
-                            elif numSelected == 1: # if there is one item selected already
-                                if cellPos != selected[0]: # if that item isnt the first item
-                                    selected[1] = cellPos
-                                    numSelected += 1
-                            
-                            else: # if there are already 2 selected
-                                for row in cells: 
-                                    for cell in row:
-                                        cell.update(COLOURS[COLOUR_SCHEME[0]['background']]) # resetting the grid to white
-                                numSelected = 0 # resetting the number selected
-                                selected = [[], []] # restting the items selected
-
-        for idx, coord in enumerate(wordCoords): # checking through every word coordinate
-            wordColour = random.choice([x for x in COLOURS.keys() if x[:6] == "PASTEL"])
-            if coord == selected or coord == [selected[1], selected[0]]: # if the coordinates selected are equal to word coordinate
-                startingPosition, endingPosition = coord[0], coord[1] # setting starting and ending position
-                currentPos = startingPosition # setting current position
-                while currentPos != endingPosition: # checking through every cell
-                    curCell = cells[currentPos[0]][currentPos[1]] # getting current cell
-                    curCell.update(colour=COLOURS[wordColour]) # updating cell
-                    curCell.setFinalColour(COLOURS[wordColour])
-                    curCell.setFinished() # locking the cell colour
-                    currentPos[0 if coord[0][0] != coord[1][0] else 1] += 1 # incrementing horizontal / vertical depening on coordinates
-
-                endCell = cells[endingPosition[0]][endingPosition[1]] # setting the final cell (as it isnt included in the while loop)
-                endCell.update(colour=COLOURS[wordColour])
-                endCell.setFinalColour(COLOURS[wordColour])
-                endCell.setFinished() 
-
-                numSelected = 0 # resetting number selected 
-                selected = [[], []] # resetting selected coordinates
-                completedWordCoords.append(coord) # adding word to found words
-                foundWords.append(cleanWords[idx])
-                cleanWordsCopy.pop(idx)
-                wordCoords.pop(idx) # removing word from lists
-                wordDisplay.pop(idx)
-
-        if wordDisplay == []: # if there are no words left
-            finishTime = time.time() # getting current time
-            totalTime = finishTime - startTime # getting total time
-            return finishMenu(COLOUR_SCHEME, totalTime, themeName) # sending user to finish menu
-
-        curTime = time.time() # getting time
-        nowTime = curTime - startTime # calculating time taken
-        curMins = int(nowTime // 60)
-        curSecs = int(nowTime % 60) # parsing to mins / secs
-        timeDisp.setText(f"Time: {curMins}:{curSecs:02d}") # displaying current time taken
-
-        window.fill(COLOURS[COLOUR_SCHEME[0]['background']]) # clearing the screen
-        for x in pButtons: x.draw() # redrawing buttons
-        for x in wordDisplay: x.draw() # drawing words
-
-        for row in cells: 
-            for cell in row: cell.draw() # drawing the cells to the screen
+class Menu(Scene): # a screen drawn by a Renderer in the current colour scheme
+    def __init__(self, manager):
+        super().__init__(manager)
+        self.COLOUR_SCHEME = manager.colourScheme
+        self.renderer = Renderer(window, COLOURS[self.COLOUR_SCHEME[0]['background']], dirtyRects=DIRTY_RECTS) # only redraws what changed
+
+    def enter(self):
+        super().enter()
+        self.renderer.invalidate() # another scene has drawn over the whole window
+
+    def redraw(self):
+        self.renderer.invalidate()
+
+class MainMenu(Menu): # Main Menu
+    caption = "Main Menu" # Settings the title of the game window
+
+    def __init__(self, manager):
+        super().__init__(manager)
+        COLOUR_SCHEME = self.COLOUR_SCHEME
+        self.mButtons = []
+        self.mButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttonsVar2']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=self.playDaily, geo=[
+            int(WIDTH / 2 - 50), int(HEIGHT / 2 - 75), 100, 50], text="Daily Puzzle")) # the same puzzle for everyone today
+        self.mButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=manager.push, geo=[
+            int(WIDTH / 2 - 50), int(HEIGHT / 2 - 25), 100, 50], text="Play Menu", params=["themeChoice"])) # adding a play button
+        self.mButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=manager.push, geo=[
+            int(WIDTH / 2 - 50), int(HEIGHT / 2 + 25), 100, 50], text="Leaderboard", params=["leaderboardMenu"])) # Adding a leaderboard button
+        self.mButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=manager.push, geo=[
+            int(WIDTH / 2 - 50), int(HEIGHT / 2 + 75), 100, 50], text="Settings Menu", params=["settingsMenu"])) # adding a settings button
+
+        self.buttonIndex = SpatialIndex(self.mButtons) # only checking the buttons near a click
+
+    def playDaily(self):
+        try:
+            self.manager.push(dailyPuzzle(self.manager, time.perf_counter()))
+        except ValueError as error: # today's theme has no usable words
+            log.warning("can't make today's puzzle: %s", error)
+
+    def handleEvent(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            mouse = event.pos # where the click was, also for replayed clicks
+            for button in self.buttonIndex.query(mouse):
+                if button.getHasFunc():
+                    button.callFunc(mouse)
 
+    def draw(self):
+        self.renderer.draw(self.mButtons) # drawing the buttons to screen
+
+def endpointKey(start, end): # the same key whichever end of a word was clicked first
+    return tuple(sorted([tuple(start), tuple(end)]))
+
+class PlayMenu(Menu): # Game Menu, one per game
+    caption = "Play Menu" # Changing the caption of the window
+
+    def __init__(self, manager, grid, words, wordCoords, cleanWords, themeName, clickTime=None, puzzleKey=None):
+        super().__init__(manager)
+        COLOUR_SCHEME = self.COLOUR_SCHEME
+        # cleanWords is so that I can display the words the user is to find, as they are flipped backwards on generation.
+        self.startTime = time.time()
+        self.themeName = themeName
+        self.puzzleKey = puzzleKey # the cached puzzle being played, saved with the score so it can be replayed
+        self.clickTime = clickTime # when the theme was clicked, for timing how long the game took to appear
+        self.wordCoords = wordCoords
+        self.pButtons = []
+        self.pButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=manager.popToRoot, geo=[WIDTH - 100, 0, 100, 50], text="Main Menu")) # Adding a button to fall back to the main menu
+        self.pButtons.append(timeDisp := Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[WIDTH - 100, 50, 100, 50], text="Time: "))
+        self.timeDisp = timeDisp
+
+        # declaring variables
+
+        cleanWords = sorted(cleanWords, key=len, reverse=True)
+
+        self.gridSize = gridSize = len(grid)
+        self.screenCenter = screenCenter = ( WIDTH / 2, HEIGHT / 2 ) # getting the very middle of the screen
+        self.cellSize = cellSize = (
+            (screenCenter[0] / gridSize) / 1.2,
+            (screenCenter[1] / gridSize) * 1.75
+        ) # generating the size of the cells
+        self.numSelected = 0
+        self.selected = [[], []]
+        self.clickedCells = [] # ids of cells coloured by clicks, so only they need resetting
+        self.wordDisplay = []
+        self.foundIds = set() # ids (indexes into wordCoords) of the words found so far
+        self.allIds = set(range(len(wordCoords)))
+        self.wordIndex = {endpointKey(coord[0], coord[1]): idx for idx, coord in enumerate(wordCoords)} # a words ends, either way round -> its id
+
+        self.buildCells(grid)
+
+        for idx, word in enumerate(cleanWords): # usually 5, fewer if the theme had words inside other words
+            self.wordDisplay.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[(screenCenter[0] + (WIDTH / 4)) - 50, screenCenter[1] - (100 * (idx - 2)), 100, 50], text=word, fontSize=30))
+        self.shownWords = list(self.wordDisplay) # the words still to be found
+
+        self.lineLayer = self.makeLineLayer()
+        self.buttonIndex = SpatialIndex(self.pButtons)
+
+    def buildCells(self, grid):
+        COLOUR_SCHEME, cellSize = self.COLOUR_SCHEME, self.cellSize
+        self.palette = [COLOURS[COLOUR_SCHEME[0]['background']]] + [COLOURS[name] for name in PASTELS] # colour 0 is an untouched cell
+        self.board = Board(window, grid, self.palette, getFont("Arial", 30), COLOURS[COLOUR_SCHEME[0]['text']]) # a few bytes per cell rather than an object each
+        self.board.layout((50, 50), cellSize, (cellSize[0] + 5, cellSize[1] - 4)) # each box is a little wider than the gap between the lines
+
+    def makeLineLayer(self): # the lines only depend on the grid size and line colour
+        return getStaticLayer(("playMenu", self.gridSize, self.COLOUR_SCHEME[0]['lines']), (WIDTH, HEIGHT), self.drawLines)
+
+    def drawLines(self, surface): # the grid lines, drawn once into a layer that goes over the cells
+        COLOUR_SCHEME, screenCenter, cellSize = self.COLOUR_SCHEME, self.screenCenter, self.cellSize
         # Draw Outline
-        pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(50, 50), pygame.math.Vector2(screenCenter[0] - 50, 50), 3) # Top
-        pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(50, HEIGHT - 50), pygame.math.Vector2(screenCenter[0] - 50, HEIGHT - 50), 3) # Bottom
-        pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(50, 50), pygame.math.Vector2(50, HEIGHT - 50), 3) # Left
-        pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(screenCenter[0] - 50, 50), pygame.math.Vector2(screenCenter[0] - 50, HEIGHT - 50), 3) # Right
-         
+        pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(50, 50), pygame.math.Vector2(screenCenter[0] - 50, 50), 3) # Top
+        pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(50, HEIGHT - 50), pygame.math.Vector2(screenCenter[0] - 50, HEIGHT - 50), 3) # Bottom
+        pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(50, 50), pygame.math.Vector2(50, HEIGHT - 50), 3) # Left
+        pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(screenCenter[0] - 50, 50), pygame.math.Vector2(screenCenter[0] - 50, HEIGHT - 50), 3) # Right
+
         # Draw columns
-        for i in range(0, gridSize):
-            pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], 
+        for i in range(0, self.gridSize):
+            pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], 
                 pygame.math.Vector2(50 + cellSize[0] * (i), 50),
                 pygame.math.Vector2(50 + cellSize[0] * (i), HEIGHT - 50), 3
             )
 
         # Draw rows
-        for i in range(0, gridSize):
-            pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']],
+        for i in range(0, self.gridSize):
+            pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']],
                 pygame.math.Vector2(50, 50 + cellSize[1] * (i)),
                 pygame.math.Vector2(screenCenter[0] - 50, 50 + cellSize[1] * (i)), 3
             )
 
-
-        pygame.display.flip()
-        clock.tick(FPS)
-
-def settingsMenu(COLOUR_SCHEME): # Settings Menu Loop
-    sButtons = [] 
-    pygame.display.set_caption("Settings Menu") # Changing the caption of the window
-    sButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=mainMenu, geo=[WIDTH-100, 0, 100, 50], text="Main Menu", params=[COLOUR_SCHEME])) # Adding a button to fall back to the main menu
-    sButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=changeColourTheme, geo=[50, 100, 110, 50], text="Change Theme", params=[COLOUR_SCHEME], hasReturn=True))
-
-
-    while True: # Beginning a loop for the game
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                quit() # Quitting the window
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse = pygame.mouse.get_pos()
-                for button in sButtons:
-                    if not button.getHasReturn():
-                        button.setParams([COLOUR_SCHEME])
-                        if button.getHasFunc():
-                            button.callFunc(mouse) # Calling button functions
-                    else:
-                        if button.getHasFunc():
-                            COLOUR_SCHEME = [button.getFunc(mouse)(*button.getParams())] # getting the new colour scheme            
-
-        window.fill(COLOURS[COLOUR_SCHEME[0]['background']])
-        for x in sButtons: x.draw(); x.updateColour(COLOURS[COLOUR_SCHEME[0]['buttons']]); x.updateTextColour(COLOURS[COLOUR_SCHEME[0]['text']]) # updaing buttons to new colour scheme
+    def wordCells(self, wordId): # the grid positions a word covers, from one end to the other
+        return lineCells(*self.wordCoords[wordId])
+
+    def markFound(self, wordId): # colouring a found word and taking it off the list
+        wordColour = random.randrange(1, len(self.palette))
+        for x, y in self.wordCells(wordId): # checking through every cell
+            self.board.finish(self.board.cellId(x, y), wordColour) # locking the cell colour
+        self.foundIds.add(wordId)
+        self.shownWords.remove(self.wordDisplay[wordId])
+        self.renderer.markArea(self.wordDisplay[wordId].drawnRect) # clearing where the word was
+
+
+    def handleEvent(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            mouse = event.pos
+            for button in self.buttonIndex.query(mouse):
+                if button.getHasFunc():
+                    button.callFunc(mouse) # Calling the functions associated with buttons
+
+            cellId = self.board.cellAt(mouse) # working out which cell was clicked straight from the position
+            if cellId is not None:
+                self.board.select(cellId, random.randrange(1, len(self.palette)))
+                self.select(cellId, self.board.position(cellId))
+
+    def select(self, cellId, cellPos): # a clicked cell, cellPos in grid coordinates
+        self.clickedCells.append(cellId)
+        if self.numSelected == 0: # if the current number selected is 0
+            self.selected[0] = cellPos # setting the first item in "Selected" to the current position
+            self.numSelected += 1 # incremeting the num selected
         
+        elif self.numSelected == 1: # if there is one item selected already
+            if cellPos != self.selected[0]: # if that item isnt the first item
+                self.selected[1] = cellPos
+                self.numSelected += 1
+                wordId = self.wordIndex.get(endpointKey(self.selected[0], self.selected[1])) # the selection is complete, so checking it against the words once
+                if wordId is not None and wordId not in self.foundIds:
+                    self.markFound(wordId)
+                    self.clickedCells = []
+                    self.numSelected = 0 # resetting number selected 
+                    self.selected = [[], []] # resetting selected coordinates
         
-        pygame.display.flip()
-        clock.tick(FPS)
-
-def leaderboardMenu(COLOUR_SCHEME): # Leaderboard Menu Loop
-    lButtons = []
-    titleButtons = []
-    lButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=mainMenu, geo=[0, 0, 100, 50], text="Main Menu", params=[COLOUR_SCHEME])) # fallback button for main menu
-    lButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttonsVar2']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=wipeDB, geo=[WIDTH/2 - 75, HEIGHT-50, 150, 50], text="Clear Database", params=[COLOUR_SCHEME]))
-
-    titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[225, 110, 100, 50], text="User Name")) # column name
-    titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[590, 110, 100, 50], text="Theme Name")) # column name
-    titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[990, 110, 100, 50], text="Time Taken")) # column name
-
-    pygame.display.set_caption("Leaderboard")
-
-    conn = sql.connect('components/database.db') # connecting to the database
-    cursor = conn.cursor()
-
-    data = cursor.execute("SELECT * FROM Players ORDER BY time ASC").fetchall() # getting all data from database
-
-    conn.commit()
-    conn.close()
-
-    for idx, item in enumerate(data):
-        if idx < 8:
-            titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[105, 160+(60*idx), 100, 50], text=item[1]))
-            titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[435, 160+(60*idx), 100, 50], text=item[2]))
-            titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[(WIDTH-430)+5, 160+(60*idx), 100, 50], text=item[3])) # writing the rows in
-
-    while True: # Beginning a loop for the game
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                quit() # Quitting the window
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse = pygame.mouse.get_pos()
-                for button in lButtons:
-                    if button.getHasFunc():
-                        button.callFunc(mouse) # Calling button functions
-        
-        window.fill(COLOURS[COLOUR_SCHEME[0]['background']])
-        for x in lButtons: x.draw()
-        for x in titleButtons: x.draw() # drawing all titles
-
-        pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(100, 100), pygame.math.Vector2(WIDTH-100, 100), 3) # top line for box
-        pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(100, HEIGHT-100), pygame.math.Vector2(WIDTH-100, HEIGHT-100), 3) # bottom line for box
-        pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(100, 100), pygame.math.Vector2(100, HEIGHT-100), 3) # left line for box
-        pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(WIDTH-100, 100), pygame.math.Vector2(WIDTH-100, HEIGHT-100), 3) # right line for box
-
-        pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(430, 100), pygame.math.Vector2(430, HEIGHT-100), 3) # left hand divider
-        pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(WIDTH-430, 100), pygame.math.Vector2(WIDTH-430, HEIGHT-100), 3) # right hand divider
+        else: # if there are already 2 selected
+            self.clearClicked()
+            self.numSelected = 0 # resetting the number selected
+            self.selected = [[], []] # restting the items selected
 
-        for i in range(8):
-            pygame.draw.line(window, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(100, 150+(60*i)), pygame.math.Vector2(WIDTH-100, 150+(60*i)), 3) # center dividers
-
-        pygame.display.flip()
-        clock.tick(FPS)
-
-def finishMenu(COLOUR_SCHEME, timeTaken, themeName): # Finish Menu Loop
-    fButtons = []
-    inputBoxes = []
-    pygame.display.set_caption("Main Menu") # Settings the title of the game window
-
-    timeMins = int(timeTaken // 60)
-    timeSecs = int(timeTaken % 60) # parsing time into displayable format
-
-    # creating buttons and boxes to display at the end
-
-    fButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=mainMenu, geo=[WIDTH - 100, 0, 100, 50], text="Main Menu", params=[COLOUR_SCHEME])) # Adding a button to fall back to the main menu
-    fButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[WIDTH / 4 - 315, HEIGHT / 4 + 75, WIDTH, HEIGHT / 3], text="Congratulations!", fontSize=175))
-    fButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['text']], tColour=COLOURS[COLOUR_SCHEME[0]['background']], geo=[(WIDTH / 2) + 100, (HEIGHT / 2) + 200, 200, 75], text=f"Time: {timeMins}m:{timeSecs:02d}s", fontSize=20))
-    fButtons.append(submitBtn := Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[(WIDTH / 2) - 50, HEIGHT - 50, 100, 50], text="Submit", fontSize=20, func=addToDatabase, params=[]))
-    inputBoxes.append(nameBox := InputBox(geo=[(WIDTH / 2) - 300, (HEIGHT / 2) + 200, 200, 75], placeholderText="Enter Name", borderColour=COLOURS[COLOUR_SCHEME[0]['background']], borderThickness=0, colour=COLOURS[COLOUR_SCHEME[0]['text']], tColour=COLOURS[COLOUR_SCHEME[0]['background']])) # title input
-
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT: # allowing the user to quit the window
-                quit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse = pygame.mouse.get_pos()
-                for button in fButtons: 
-                    if button.getHasFunc():
-                        button.callFunc(mouse)
-                for inputBox in inputBoxes: inputBox.focus(mouse, inputBoxes) # focusing input box
-            if event.type == pygame.KEYDOWN:
-                for inputBox in inputBoxes: inputBox.writeToText(event.unicode) # adding text to button
-
-        username = nameBox.getText() # getting username
-        submitBtn.setParams([username, f"{timeMins}:{timeSecs:02d}", themeName, COLOUR_SCHEME]) # setting paramaters
-        
-        window.fill(COLOURS[COLOUR_SCHEME[0]['background']]) # refreshing the screen
-        for x in fButtons: x.draw() # drawing the buttons to screen
-        for x in inputBoxes: x.draw()
-
-        pygame.display.flip() # refreshing the display
-        clock.tick(FPS)
-
-def newTheme(COLOUR_SCHEME): # input for new theme menu thingy
-    mButtons = [] # list for buttons on the screen
-    inputBoxes = [] # list for input boxes on the screen
-    themeTitle, themeBody = '', '' # declaring the theme title and body variables
-    mButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=mainMenu, geo=[0, 0, 100, 50], text="Main Menu", params=[COLOUR_SCHEME])) # fallback button for main menu
-    mButtons.append(submitButton := Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=submitTheme, geo=[WIDTH-100, HEIGHT-50, 100, 50], text="Submit Theme", params=[themeTitle, themeBody, COLOUR_SCHEME])) # adding a submit button
-
-    inputBoxes.append(titleBox := InputBox(geo=[WIDTH / 2 - ((WIDTH / 1.5) / 2), 50, 200, 50], placeholderText="Title")) # title input
-    inputBoxes.append(bodyBox := InputBox(geo=[WIDTH / 2 - ((WIDTH / 1.5) / 2), HEIGHT / 2 - ((HEIGHT / 1.5) / 2), WIDTH / 1.5, HEIGHT / 1.5], placeholderText="Please enter at least 5 words here, seperated by commas, no spaces in words")) # theme body input
-
-    pygame.display.set_caption("New Theme Creation") # setting the game name to "New Theme Creation"
-
-    while True: # creating a loop to display the buttons
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                quit() # Quitting the window
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse = pygame.mouse.get_pos()
-                for button in mButtons: 
-                    if button.getHasFunc(): button.callFunc(mouse) # Calling button functions
-                for inputBox in inputBoxes: inputBox.focus(mouse, inputBoxes)
-            if event.type == pygame.KEYDOWN:
-                for inputBox in inputBoxes: inputBox.writeToText(event.unicode) 
-        
-        window.fill(COLOURS[COLOUR_SCHEME[0]['background']]) # blanking the screen
+    def clearClicked(self):
+        self.board.clearSelection(self.clickedCells) # resetting the clicked cells
+        self.clickedCells = []
 
-        themeTitle = titleBox.getText() # re-setting the title to the current text
-        themeBody = bodyBox.getText() # re-setting the body to the current text
-        submitButton.setParams([themeTitle, themeBody, COLOUR_SCHEME]) # setting the parameters of the submission button
-
-        for x in mButtons: x.draw() # Drawing the buttons
-        for x in inputBoxes: x.draw() # drawing input boxes
-
-        pygame.display.flip()
-        clock.tick(FPS)
-
-def themeChoice(COLOUR_SCHEME): # Theme Choice Menu Loop
-    themeButtons = []
-    themeButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=mainMenu, geo=[0, 0, 100, 50], text="Main Menu", params=[COLOUR_SCHEME])) # fallback button for main menu
-    themeButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=newTheme, geo=[100, 0, 100, 50], text="New Theme", params=[COLOUR_SCHEME])) # new theme create menu button
+    def update(self):
+        if self.foundIds == self.allIds: # if there are no words left
+            finishTime = time.time() # getting current time
+            totalTime = finishTime - self.startTime # getting total time
+            self.manager.replace(FinishMenu(self.manager, totalTime, self.themeName, self.puzzleKey)) # sending user to finish menu, this game is done with
+            return
 
-    pygame.display.set_caption("Theme Selection") 
+        curTime = time.time() # getting time
+        nowTime = curTime - self.startTime # calculating time taken
+        curMins = int(nowTime // 60)
+        curSecs = int(nowTime % 60) # parsing to mins / secs
+        self.timeDisp.setText(f"Time: {curMins}:{curSecs:02d}") # displaying current time taken
 
-    with open('components/themes.json', 'r') as f: # loading themes file 
-        themes = json.load(f)
-    
-    themeList = [] # creating a list to store the theme titles
+    def getWakeDelay(self): # just after the timer's next whole second
+        return 1.005 - (time.time() - self.startTime) % 1
 
-    for x in themes.keys(): themeList.append(x) # appending theme names to a list
-    themeNames = [x for x in themes.keys()]
-
-    themeCounter = 0
-    for idx, theme in enumerate(themeList):
-        if themeCounter >= 13: # if there are more than 13 themes in the current column
-            themeCounter = 0 # reset themeCounter
-        themeButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttonsVar2']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=wordsearchGen, geo=[(idx//13)*100, (themeCounter+1)*50, 100, 50], text=theme, params=[theme, themeNames[idx], COLOUR_SCHEME])) # creating buttons with theme names
-        themeCounter += 1
-        # here i am using counters and ifs to write the theme buttons across the screen so they dont go off
-
-    while True: # creating a loop to display the buttons
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                quit() # Quitting the window
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse = pygame.mouse.get_pos()
-                for button in themeButtons:
+    def draw(self):
+        for area in self.board.takeChanged():
+            self.renderer.markArea(area) # cells that changed colour
+        self.renderer.draw(self.pButtons + self.shownWords + [self.board], self.lineLayer) # redrawing buttons, words and cells that changed, with the grid lines over them
+        if self.clickTime is not None: # the first frame is on screen
+            puzzlePool.recordLatency(time.perf_counter() - self.clickTime)
+            self.clickTime = None
+
+class ViewportPlayMenu(PlayMenu): # Game Menu for grids too big to fit, only the cells on screen are drawn
+    def buildCells(self, grid):
+        self.view = Viewport(self.gridSize, (50, 50, int(self.screenCenter[0]) - 100, HEIGHT - 100)) # the same area a small grid fills
+        self.dragStart = None # (mouse position, view origin) while the right or middle button is held
+        self.lineLayer = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA) # redrawn whenever the view moves
+        self.pButtons.append(Button(colour=COLOURS[self.COLOUR_SCHEME[0]['background']], tColour=COLOURS[self.COLOUR_SCHEME[0]['text']], geo=[50, HEIGHT - 45, int(self.screenCenter[0]) - 100, 40], text="Arrow keys or right drag to move, mouse wheel or +/- to zoom")) # how to get around, as wide as the grid so the text stays inside it
+        super().buildCells(grid)
+        self.layoutView()
+
+    def layoutView(self): # pointing the board at the visible window, cell state stays in grid space so it survives moving
+        cellPixels = self.view.getCellPixels()
+        xs, ys = self.view.visibleRange()
+        self.board.setFont(getFont("Arial", int(cellPixels * 0.6)))
+        self.board.layout(self.view.toScreen(xs.start, ys.start), (cellPixels, cellPixels), (cellPixels, cellPixels), (xs.start, ys.start, len(xs), len(ys)))
+        self.lineLayer.fill((0, 0, 0, 0))
+        self.drawLines(self.lineLayer)
+
+    def makeLineLayer(self):
+        return self.lineLayer
+
+    def drawLines(self, surface): # lines around the visible cells
+        lineColour = COLOURS[self.COLOUR_SCHEME[0]['lines']]
+        xs, ys = self.view.visibleRange()
+        left, top = self.view.toScreen(xs.start, ys.start)
+        right, bottom = self.view.toScreen(xs.stop, ys.stop)
+        for x in range(xs.start, xs.stop + 1): # columns
+            lineX = self.view.toScreen(x, 0)[0]
+            pygame.draw.line(surface, lineColour, (lineX, top), (lineX, bottom), 2)
+        for y in range(ys.start, ys.stop + 1): # rows
+            lineY = self.view.toScreen(0, y)[1]
+            pygame.draw.line(surface, lineColour, (left, lineY), (right, lineY), 2)
+
+    def changeView(self, moved):
+        if moved:
+            self.layoutView()
+            self.renderer.markArea(pygame.Rect(self.view.area).inflate(4, 4)) # the lines move too, the rest of the screen stays
+
+    def stopDrag(self):
+        self.dragStart = None
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
+
+    def exit(self):
+        self.stopDrag()
+
+    def handleEvent(self, event):
+        if event.type == pygame.MOUSEWHEEL:
+            self.changeView(self.view.zoomAt(event.y, event.pos)) # zooming around the mouse, the manager adds where it was
+        elif event.type == pygame.KEYDOWN and event.key in PAN_KEYS:
+            dx, dy = PAN_KEYS[event.key]
+            step = max(self.view.getSize()) if event.mod & pygame.KMOD_SHIFT else 1 # a screenful at a time with shift
+            self.changeView(self.view.pan(dx * step, dy * step))
+        elif event.type == pygame.KEYDOWN and event.key in ZOOM_KEYS:
+            area = self.view.area
+            self.changeView(self.view.zoomAt(ZOOM_KEYS[event.key], (area[0] + area[2] // 2, area[1] + area[3] // 2))) # zooming around the middle
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (2, 3):
+            self.dragStart = (event.pos, (self.view.originX, self.view.originY))
+            pygame.event.set_allowed(pygame.MOUSEMOTION) # only while dragging, so an idle game still sleeps
+        elif event.type == pygame.MOUSEMOTION and self.dragStart is not None:
+            (startX, startY), (originX, originY) = self.dragStart
+            cellPixels = self.view.getCellPixels()
+            self.changeView(self.view.moveTo(originX - (event.pos[0] - startX) // cellPixels, originY - (event.pos[1] - startY) // cellPixels))
+        elif event.type == pygame.MOUSEBUTTONUP and event.button in (2, 3):
+            self.stopDrag()
+        elif event.type != pygame.MOUSEBUTTONDOWN or event.button == 1: # the wheel also sends button 4 / 5 presses
+            super().handleEvent(event)
+
+def makePlayMenu(manager, puzzle, themeName, clickTime=None): # the play screen for a puzzle, through a viewport if the grid is too big to fit
+    sceneClass = ViewportPlayMenu if puzzle.getGridSize() > VIEWPORT_MIN_SIZE else PlayMenu
+    return sceneClass(manager, puzzle.grid, puzzle.words, puzzle.wordLocations, puzzle.cleanWords, themeName, clickTime, puzzle.key)
+
+class SettingsMenu(Menu): # Settings Menu
+    caption = "Settings Menu" # Changing the caption of the window
+
+    def __init__(self, manager):
+        super().__init__(manager)
+        COLOUR_SCHEME = self.COLOUR_SCHEME
+        self.sButtons = [] 
+        self.sButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=manager.popToRoot, geo=[WIDTH-100, 0, 100, 50], text="Main Menu")) # Adding a button to fall back to the main menu
+        self.sButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=changeColourTheme, geo=[50, 100, 110, 50], text="Change Theme", params=[COLOUR_SCHEME], hasReturn=True))
+
+        self.buttonIndex = SpatialIndex(self.sButtons)
+
+    def setColourScheme(self, COLOUR_SCHEME):
+        self.COLOUR_SCHEME = COLOUR_SCHEME
+        self.manager.setColourScheme(COLOUR_SCHEME) # the other screens get rebuilt in the new colours
+        for x in self.sButtons: x.updateColour(COLOURS[COLOUR_SCHEME[0]['buttons']]); x.updateTextColour(COLOURS[COLOUR_SCHEME[0]['text']]) # updaing buttons to new colour scheme
+        self.renderer.invalidate(COLOURS[COLOUR_SCHEME[0]['background']]) # the whole screen changes colour
+
+    def handleEvent(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            mouse = event.pos
+            for button in self.buttonIndex.query(mouse):
+                if not button.getHasReturn():
                     if button.getHasFunc():
                         button.callFunc(mouse) # Calling button functions
-        
-        window.fill(COLOURS[COLOUR_SCHEME[0]['background']])
-        for x in themeButtons: x.draw() # Drawing the buttons
+                else:
+                    if button.getHasFunc() and button.getFunc(mouse):
+                        self.setColourScheme([button.getFunc(mouse)(*button.getParams())]) # getting the new colour scheme
 
-        pygame.display.flip()   
-        clock.tick(FPS)
+    def draw(self):
+        self.renderer.draw(self.sButtons)
+
+class LeaderboardMenu(Menu): # Leaderboard Menu
+    caption = "Leaderboard"
+
+    def __init__(self, manager):
+        super().__init__(manager)
+        COLOUR_SCHEME = self.COLOUR_SCHEME
+        self.lButtons = []
+        self.lButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=manager.popToRoot, geo=[0, 0, 100, 50], text="Main Menu")) # fallback button for main menu
+        self.lButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttonsVar2']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=self.clearScores, geo=[WIDTH/2 - 75, HEIGHT-50, 150, 50], text="Clear Database"))
+        self.titleButtons = []
+        self.replayButtons = []
+
+        self.tableLayer = getStaticLayer(("leaderboardMenu", 0, COLOUR_SCHEME[0]['lines']), (WIDTH, HEIGHT), self.drawLines)
+        self.buttonIndex = SpatialIndex(self.lButtons)
+
+    def loadScores(self): # the scores can change between visits, so they are read every time the screen is shown
+        COLOUR_SCHEME = self.COLOUR_SCHEME
+        self.titleButtons = []
+        self.replayButtons = []
+        self.titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[225, 110, 100, 50], text="User Name")) # column name
+        self.titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[590, 110, 100, 50], text="Theme Name")) # column name
+        self.titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[990, 110, 100, 50], text="Time Taken")) # column name
+
+        data = db.topScores(limit=8) # only the 8 fastest, straight off the index
+
+        for idx, item in enumerate(data):
+            self.titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[105, 160+(60*idx), 100, 50], text=item[0]))
+            self.titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[435, 160+(60*idx), 100, 50], text=item[1]))
+            self.titleButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[(WIDTH-430)+5, 160+(60*idx), 100, 50], text=database.formatTime(item[2]))) # writing the rows in
+            if item[3]: # scores from before puzzles were stored can't be replayed
+                self.replayButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=self.replay, geo=[WIDTH-95, 160+(60*idx), 90, 50], text="Replay", params=[item[3]]))
+
+        self.buttonIndex = SpatialIndex(self.lButtons + self.replayButtons)
+        self.renderer.invalidate()
+
+    def clearScores(self):
+        wipeDB()
+        self.loadScores() # refreshing the screen
+
+    def replay(self, puzzleKey): # the exact puzzle the score was set on
+        scene = replayPuzzle(puzzleKey, self.manager, time.perf_counter())
+        if scene is not None:
+            self.manager.push(scene)
+
+    def drawLines(self, surface): # the table lines, drawn once into a layer
+        COLOUR_SCHEME = self.COLOUR_SCHEME
+        pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(100, 100), pygame.math.Vector2(WIDTH-100, 100), 3) # top line for box
+        pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(100, HEIGHT-100), pygame.math.Vector2(WIDTH-100, HEIGHT-100), 3) # bottom line for box
+        pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(100, 100), pygame.math.Vector2(100, HEIGHT-100), 3) # left line for box
+        pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(WIDTH-100, 100), pygame.math.Vector2(WIDTH-100, HEIGHT-100), 3) # right line for box
+
+        pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(430, 100), pygame.math.Vector2(430, HEIGHT-100), 3) # left hand divider
+        pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(WIDTH-430, 100), pygame.math.Vector2(WIDTH-430, HEIGHT-100), 3) # right hand divider
 
-def wordsearchGen(theme, themeName, COLOUR_SCHEME): # This generates the words for the grid, and the size of the grid
-    with open("components/themes.json","r") as f:
-        themes = json.load(f)
-        data = themes[theme] # Assigning data to be the list of words within the theme.
-    
-    words = []
-    wordsDisplay = []
-    grid = []
-    wordLocations = []
-    cleanWordList = []
-    gridSize = 0 # declaring variables for later use
-
-    for _ in range(5): # Picking 5 random words
-        wordIdx = random.randint(0, len(data)-1) # Getting a random index for a word
-        backward = random.randint(0, 2) # Generating whether the word will be forwards or backwards
-        cleanWordList.append(data[wordIdx])
-        if backward <= 1:
-            words.append(data[wordIdx]) # Appending the word index to the word list
-        else:
-            words.append(data[wordIdx][::-1]) # Appending the word index to the word list (backwards)
+        for i in range(8):
+            pygame.draw.line(surface, COLOURS[COLOUR_SCHEME[0]['lines']], pygame.math.Vector2(100, 150+(60*i)), pygame.math.Vector2(WIDTH-100, 150+(60*i)), 3) # center dividers
 
-        wordsDisplay.append(data[wordIdx])
-        data.pop(wordIdx) # Removing the word from the available list
-    
-    for idx, item in enumerate(words):
-        words[idx] = item.upper() # setting the words to be capitalised
-        gridSize = len(item) if len(item) > gridSize else gridSize # Changing the gridsize to the length of the longest word
-    
-    gridSize += 3 # increasing the size by 1
-    
-    for x in range(gridSize):
-        grid.append([])
-        for y in range(gridSize):
-            grid[x].append(None) # generating the grid based on the size
-
-    sWords = sorted(words, key=len, reverse=True) # sorting the words into length order
-
-    for word in sWords:
-        grid, singleWordLocation = searchGen(grid, word, sWords) # generating grid and word locations
-        wordLocations.append(singleWordLocation) # adding word locations to list
-
-    grid = fillGrid(grid) # filling the gaps in the grid
-
-    return playMenu(grid, sWords, wordLocations, cleanWordList, themeName, COLOUR_SCHEME) # returning the grid, wordpositions, and a list of unchanged words to the playMenu function
-
-def searchGen(grid, word, words, runs=0): # generating the wordsearch
-    curRun = runs # getting the current runs
-    wordLocation = [[], []]
-    if curRun <= 100: # preventing program from recursing too much
-        direction = random.choice([['vertical', 0],['horizontal', 1]]) # vertical, horizontal
-
-        curRun += 1
-        randomSpot = [
-            # if the direction is horizontal generate random for size of grid for y,
-            random.randint(0, len(grid) - 1) if direction[1] == 1 else random.randint(0, len(grid) - len(word) - 1),
-            # if the direction is vertical generate random for size of grid for x,
-            random.randint(0, len(grid) - 1) if direction[1] == 0 else random.randint(0, len(grid) - len(word) - 1),
-        ]
-
-        if direction[1] == 0: # vertical
-            for idx, char in enumerate(word): # index of char in word and the char itself
-                if grid[randomSpot[0] + idx][randomSpot[1]] != None: # if the spot isnt empty
-                    return searchGen(grid, word, words, runs=curRun) # re-run the function
-            for idx, char in enumerate(word): # writing the word to grid
-                grid[randomSpot[0] + idx][randomSpot[1]] = char # setting grid spots
-            wordLocation[0] = randomSpot # first char location = random spot
-            wordLocation[1] = [randomSpot[0] + len(word)-1, randomSpot[1]] # last char location = random spot + length of word          
-            
-        elif direction[1] == 1: # horizontal
-            for idx, char in enumerate(word):
-                if grid[randomSpot[0]][randomSpot[1] + idx] != None:
-                    return searchGen(grid, word, words, runs=curRun)
-            for idx, char in enumerate(word):
-                grid[randomSpot[0]][randomSpot[1] + idx] = char
-            wordLocation[0] = randomSpot
-            wordLocation[1] = [randomSpot[0], randomSpot[1] + len(word)-1] # same as above ^
-
-    elif curRun > 100:
-        gridSize = len(grid) - 1
-        grid = []
-
-        for x in range(gridSize):
-            grid.append([])
-            for y in range(gridSize): # resetting the grid
-                grid[x].append(None)
-        
-        for word in words:
-            grid = searchGen(grid, word, words) # restarting the function from plain if there are over 100 attempts
-    
-    return grid, wordLocation # return the wordLocation and the grid
+    def enter(self):
+        super().enter()
+        self.loadScores()
 
-def fillGrid(grid): # filling the grid with random letters after
-    for idx, row in enumerate(grid): 
-        for index, item in enumerate(row):
-            if item == None:
-                grid[idx][index] = string.ascii_uppercase[random.randint(0, len(string.ascii_uppercase) - 1)] # filling the grid with random characters
-    
-    return grid # returning the grid
+    def handleEvent(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            mouse = event.pos
+            for button in self.buttonIndex.query(mouse):
+                if button.getHasFunc():
+                    button.callFunc(mouse) # Calling button functions
 
-def submitTheme(title, body, COLOUR_SCHEME):
-    with open ('components/themes.json', 'r') as f:
-        themes = json.load(f) # loading current themes from file
-    
-    body = body.replace(' ', '') # removing whitespace
-    themes[title] = body.split(',') # splitting on commas
+    def draw(self):
+        self.renderer.draw(self.lButtons + self.titleButtons + self.replayButtons, self.tableLayer) # drawing all titles with the table over them
+
+class FinishMenu(Menu): # Finish Menu, one per game
+    caption = "Main Menu" # Settings the title of the game window
+
+    def __init__(self, manager, timeTaken, themeName, puzzleKey=None):
+        super().__init__(manager)
+        COLOUR_SCHEME = self.COLOUR_SCHEME
+        self.themeName = themeName
+        self.puzzleKey = puzzleKey
+        self.fButtons = []
+        self.inputBoxes = []
+
+        self.timeMs = int(timeTaken * 1000) # stored as whole milliseconds
+        timeMins = int(timeTaken // 60)
+        timeSecs = int(timeTaken % 60) # parsing time into displayable format
+
+        # creating buttons and boxes to display at the end
+
+        self.fButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=manager.popToRoot, geo=[WIDTH - 100, 0, 100, 50], text="Main Menu")) # Adding a button to fall back to the main menu
+        self.fButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['background']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[WIDTH / 4 - 315, HEIGHT / 4 + 75, WIDTH, HEIGHT / 3], text="Congratulations!", fontSize=175))
+        self.fButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['text']], tColour=COLOURS[COLOUR_SCHEME[0]['background']], geo=[(WIDTH / 2) + 100, (HEIGHT / 2) + 200, 200, 75], text=f"Time: {timeMins}m:{timeSecs:02d}s", fontSize=20))
+        self.fButtons.append(submitBtn := Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], geo=[(WIDTH / 2) - 50, HEIGHT - 50, 100, 50], text="Submit", fontSize=20, func=self.submit, params=[]))
+        self.inputBoxes.append(nameBox := InputBox(geo=[(WIDTH / 2) - 300, (HEIGHT / 2) + 200, 200, 75], placeholderText="Enter Name", borderColour=COLOURS[COLOUR_SCHEME[0]['background']], borderThickness=0, colour=COLOURS[COLOUR_SCHEME[0]['text']], tColour=COLOURS[COLOUR_SCHEME[0]['background']])) # title input
+        self.submitBtn, self.nameBox = submitBtn, nameBox
+
+        self.buttonIndex = SpatialIndex(self.fButtons)
+        self.boxIndex = SpatialIndex(self.inputBoxes)
+
+    def submit(self, username, timeTaken, themeName, puzzleKey=None):
+        addToDatabase(username, timeTaken, themeName, puzzleKey)
+        self.manager.popToRoot() # sending the user to the main menu
+
+    def handleEvent(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            mouse = event.pos
+            for button in self.buttonIndex.query(mouse): 
+                if button.getHasFunc():
+                    button.callFunc(mouse)
+            for inputBox in self.boxIndex.query(mouse): inputBox.focus(mouse, self.inputBoxes) # focusing input box
+        if event.type == pygame.KEYDOWN:
+            for inputBox in self.inputBoxes: inputBox.writeToText(event.unicode) # adding text to button
+
+    def update(self):
+        username = self.nameBox.getText() # getting username
+        self.submitBtn.setParams([username, self.timeMs, self.themeName, self.puzzleKey]) # setting paramaters
+
+    def draw(self):
+        self.renderer.draw(self.fButtons + self.inputBoxes) # drawing the buttons and boxes that changed
+
+class NewTheme(Menu): # input for new theme menu thingy, a fresh one every visit
+    caption = "New Theme Creation" # setting the game name to "New Theme Creation"
+
+    def __init__(self, manager):
+        super().__init__(manager)
+        COLOUR_SCHEME = self.COLOUR_SCHEME
+        self.mButtons = [] # list for buttons on the screen
+        self.inputBoxes = [] # list for input boxes on the screen
+        themeTitle, themeBody = '', '' # declaring the theme title and body variables
+        self.mButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=manager.popToRoot, geo=[0, 0, 100, 50], text="Main Menu")) # fallback button for main menu
+        self.mButtons.append(submitButton := Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=self.submit, geo=[WIDTH-100, HEIGHT-50, 100, 50], text="Submit Theme", params=[themeTitle, themeBody])) # adding a submit button
+
+        self.inputBoxes.append(titleBox := InputBox(geo=[WIDTH / 2 - ((WIDTH / 1.5) / 2), 50, 200, 50], placeholderText="Title")) # title input
+        self.inputBoxes.append(bodyBox := InputBox(geo=[WIDTH / 2 - ((WIDTH / 1.5) / 2), HEIGHT / 2 - ((HEIGHT / 1.5) / 2), WIDTH / 1.5, HEIGHT / 1.5], placeholderText="Please enter at least 5 words here, seperated by commas, no spaces in words")) # theme body input
+        self.submitButton, self.titleBox, self.bodyBox = submitButton, titleBox, bodyBox
+
+        self.buttonIndex = SpatialIndex(self.mButtons)
+        self.boxIndex = SpatialIndex(self.inputBoxes)
+
+    def submit(self, title, body):
+        submitTheme(title, body)
+        self.manager.popToRoot()
+
+    def handleEvent(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            mouse = event.pos
+            for button in self.buttonIndex.query(mouse): 
+                if button.getHasFunc(): button.callFunc(mouse) # Calling button functions
+            for inputBox in self.boxIndex.query(mouse): inputBox.focus(mouse, self.inputBoxes)
+        if event.type == pygame.KEYDOWN:
+            for inputBox in self.inputBoxes: inputBox.writeToText(event.unicode) 
+
+    def update(self):
+        themeTitle = self.titleBox.getText() # re-setting the title to the current text
+        themeBody = self.bodyBox.getText() # re-setting the body to the current text
+        self.submitButton.setParams([themeTitle, themeBody]) # setting the parameters of the submission button
 
-    with open ('components/themes.json', 'w') as f: 
-        f.write(json.dumps(themes, indent=4)) # writing the new themes back to file
+    def draw(self):
+        self.renderer.draw(self.mButtons + self.inputBoxes) # Drawing the buttons and input boxes
+
+class ThemeChoice(Menu): # Theme Choice Menu
+    caption = "Theme Selection"
+
+    def __init__(self, manager):
+        super().__init__(manager)
+        self.themeButtons = []
+        self.themesVersion = None # the theme store version the buttons were made from, so new themes show up on the next visit
+        self.buttonIndex = SpatialIndex()
+        self.gridSize = None # size of the next grid, None fits it to the words
+        self.sizeButton = Button(colour=COLOURS[self.COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[self.COLOUR_SCHEME[0]['text']], func=self.nextGridSize, geo=[200, 0, 100, 50], text="Grid: Auto")
+
+    def loadThemes(self):
+        COLOUR_SCHEME = self.COLOUR_SCHEME
+        self.themeButtons = []
+        self.themeButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=self.manager.popToRoot, geo=[0, 0, 100, 50], text="Main Menu")) # fallback button for main menu
+        self.themeButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttons']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=self.newTheme, geo=[100, 0, 100, 50], text="New Theme")) # new theme create menu button
+        self.themeButtons.append(self.sizeButton) # big grids are played through a viewport
+
+        themeList = list(themeStore.getNames()) # the theme titles, cached by the store
+        themeNames = themeList
+        self.themesVersion = themeStore.version
+        puzzlePool.prime(themeList) # getting puzzles ready before a theme is clicked
+
+        themeCounter = 0
+        for idx, theme in enumerate(themeList):
+            if themeCounter >= 13: # if there are more than 13 themes in the current column
+                themeCounter = 0 # reset themeCounter
+            self.themeButtons.append(Button(colour=COLOURS[COLOUR_SCHEME[0]['buttonsVar2']], tColour=COLOURS[COLOUR_SCHEME[0]['text']], func=self.play, geo=[(idx//13)*100, (themeCounter+1)*50, 100, 50], text=theme, params=[theme, themeNames[idx]])) # creating buttons with theme names
+            themeCounter += 1
+            # here i am using counters and ifs to write the theme buttons across the screen so they dont go off
+
+        self.buttonIndex = SpatialIndex(self.themeButtons)
+
+    def newTheme(self):
+        self.manager.push(NewTheme(self.manager))
+
+    def nextGridSize(self):
+        self.gridSize = GRID_SIZES[(GRID_SIZES.index(self.gridSize) + 1) % len(GRID_SIZES)]
+        self.sizeButton.setText(f"Grid: {self.gridSize or 'Auto'}")
+
+    def play(self, theme, themeName):
+        try:
+            self.manager.push(wordsearchGen(theme, themeName, self.manager, time.perf_counter(), size=self.gridSize))
+        except ValueError as error: # a theme without enough usable words, or words that couldn't be placed
+            log.warning("can't make a puzzle for %r: %s", themeName, error)
+
+    def enter(self):
+        super().enter()
+        themeStore.getNames() # picking up changes made by anything else
+        if self.themesVersion != themeStore.version:
+            self.loadThemes()
+
+    def update(self): # theme names a server sent after the screen was shown
+        if self.themesVersion != themeStore.version:
+            self.loadThemes()
+            self.renderer.invalidate()
+
+    def getWakeDelay(self): # looking for them again shortly while they're on their way
+        return 0.1 if themeStore.isRefreshing() else None
+
+    def handleEvent(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            mouse = event.pos
+            for button in self.buttonIndex.query(mouse):
+                if button.getHasFunc():
+                    button.callFunc(mouse) # Calling button functions
 
-    return mainMenu(COLOUR_SCHEME)
+    def draw(self):
+        self.renderer.draw(self.themeButtons) # Drawing the buttons
+
+def wordsearchGen(theme, themeName, manager, clickTime=None, seed=None, size=None): # This generates the words for the grid, and the size of the grid, from a random seed unless one is given
+    puzzle = puzzlePool.take(theme) if seed is None and size is None else None # one generated in the background, if it's ready
+    if puzzle is None:
+        seed = random.randrange(2**32) if seed is None else seed
+        puzzle = puzzleCache.getPuzzle(themeStore, theme, seed, SAMPLE_WORDS, MAX_WORD_LENGTH, size=size) # looked up if this seed was played before, otherwise generated and stored
+
+    return makePlayMenu(manager, puzzle, themeName, clickTime) # the play screen for the grid, wordpositions, and a list of unchanged words
+
+def dailyPuzzle(manager, clickTime=None): # today's theme and seed, the same for everyone
+    seed = dailySeed()
+    themeNames = themeStore.getNames()
+    if not themeNames:
+        raise ValueError("no themes")
+    theme = themeNames[seed % len(themeNames)]
+    return wordsearchGen(theme, theme, manager, clickTime, seed=seed)
+
+def replayPuzzle(puzzleKey, manager, clickTime=None): # a stored puzzle by its key, None if it has been evicted
+    entry = puzzleCache.get(puzzleKey)
+    if entry is None:
+        return None
+    themeName, puzzle = entry
+    return makePlayMenu(manager, puzzle, themeName, clickTime)
+
+def submitTheme(title, body):
+    body = body.replace(' ', '') # removing whitespace
+    themeStore.addTheme(title, [word for word in body.split(',') if word]) # splitting on commas, only this theme is written
+    puzzlePool.discard(title) # puzzles made from the old words
 
 def changeColourTheme(COLOUR_SCHEME):
     with open("components/settings.json", "r") as f:
@@ -645,69 +743,140 @@ def changeColourTheme(COLOUR_SCHEME):
 
     settings['ColourTheme'] = SELECTED_THEME
     COLOUR_SCHEME = colThemes[SELECTED_THEME.lower()]
+    clearStaticLayers() # the cached lines were drawn in the old colours
 
     with open('components/settings.json', 'w') as f:
         f.write(json.dumps(settings, indent=4)) # writing the new settings back to file
 
     return COLOUR_SCHEME
             
-def addToDatabase(username, timeTaken, themeName, COLOUR_SCHEME):
-    conn = sql.connect("components/database.db") # opening database
-    cursor = conn.cursor() # creating a cursor to interact with the database
-
-    cursor.execute("CREATE TABLE IF NOT EXISTS Players ( id INTEGER PRIMARY KEY AUTOINCREMENT, username VARCHAR(20), themeName VARCHAR(40), time INTEGER ) ")
-    # ^ creating a table if it isnt there with the values (username, themename, and time)
-
-    cursor.execute(f"INSERT INTO Players(username, themeName, time) VALUES (?, ?, ?)", (username, themeName, timeTaken))
-    # ^ inserting the current users information into the database
+def addToDatabase(username, timeTaken, themeName, puzzleKey=None): # timeTaken in milliseconds
+    db.submitScore(username, themeName, timeTaken, puzzleKey) # queued for the writer thread, so the frame doesn't wait on the disk
 
-    conn.commit() # commiting the data
-    conn.close() # closing the connection
+def wipeDB():
+    db.wipeScores() # clearing every score
 
-    return mainMenu(COLOUR_SCHEME) # sending the user to the main menu
+WIDTH, HEIGHT = 1280, 720
+FPS = 60
+VIEWPORT_MIN_SIZE = 30 # grids bigger than this are played through a viewport, the letters are unreadable when they all fit
+GRID_SIZES = [None, 50, 100, 200] # the grid sizes on the theme screen, None sizes the grid to its words
+PAN_KEYS = {pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0), pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1)}
+ZOOM_KEYS = {pygame.K_EQUALS: 1, pygame.K_PLUS: 1, pygame.K_KP_PLUS: 1, pygame.K_MINUS: -1, pygame.K_KP_MINUS: -1}
 
-def wipeDB(COLOUR_SCHEME):
-    conn = sql.connect('components/database.db') # connecting to the database 
-    cursor = conn.cursor() # creating a cursor to interact with the data
-    cursor.execute("DROP TABLE Players") # dropping the player table to wipe it clean
-    cursor.execute("CREATE TABLE IF NOT EXISTS Players ( id INTEGER PRIMARY KEY AUTOINCREMENT, username VARCHAR(20), themeName VARCHAR(40), time INTEGER ) ") # re-creating the player table
-    conn.commit() # commiting changes
-    conn.close() # closing the connection
+db = themeStore = puzzlePool = puzzleCache = dailySeed = None # started by startServices once the main menu is showing
+settings = {}
 
-    return leaderboardMenu(COLOUR_SCHEME) # refreshing the screen
+def setup(timer=None, deferServices=True): # loading the settings and opening the window, returning the scene manager that runs the game
+    global window, clock, colThemes, DIRTY_RECTS, settings
+    timer = timer or PhaseTimer(startupStart)
+    timer.mark("imports")
+    pygame.display.init() # only the parts of pygame that get used, fonts start the first time one is needed
+    timer.mark("pygame init")
 
-if __name__ == "__main__":
     with open("components/settings.json", "r") as f:
         settings = json.load(f)
     SELECTED_THEME = settings['ColourTheme'] # loading the colour theme
+    textCache.setMaxBytes(settings.get('TextCacheMB', 8) * 1024 * 1024) # memory cap for rendered text
     
     with open("components/colourTheme.json", "r") as f:
         colThemes = json.load(f)
 
     COLOUR_THEME = [colThemes[SELECTED_THEME.lower()]]
     
-    COLOURS = {
-        "WHITE": (255, 255, 255),
-        "BLACK": (0, 0, 0),
-        "BLUE": (0, 100, 255),
-        "DARK_BLUE": (0, 0, 120),
-        "GREEN": (0, 255, 0),
-        "DARK_GREEN": (0, 120, 0),
-        "RED": (255, 50, 50),
-        "DARK_RED": (120, 0, 0),
-        "YELLOW": (255, 255, 0),
-        "DARK_GRAY": (25, 25, 25),
-        "PASTEL_RED": (255, 173, 173),
-        "PASTEL_ORANGE": (255, 214, 165),
-        "PASTEL_YELLOW": (253, 255, 182),
-        "PASTEL_GREEN": (202, 255, 191),
-        "PASTEL_BLUE": (155, 246, 255), 
-        "PASTEL_PURPLE": (189, 178, 255),
-        "PASTEL_PINK": (255, 198, 255)
-    } # declaring colours
-
-    WIDTH, HEIGHT = 1280, 720
-    FPS = 60
+    DIRTY_RECTS = settings.get('DirtyRects', True) # only redrawing the parts of the screen that changed
+    timer.mark("settings")
+
     clock = pygame.time.Clock()
     window = pygame.display.set_mode((WIDTH, HEIGHT))
-    mainMenu(COLOUR_THEME)
+    timer.mark("window")
+
+    manager = SceneManager(clock, settings.get('MaxFPS', FPS), COLOUR_THEME) # frames are only drawn when something changes, up to this rate
+    pygame.event.set_blocked(pygame.MOUSEMOTION) # nothing uses it, and it would wake the idle screens on every move
+    manager.instruments = Instruments(window, showHud=settings.get('FrameHud', False)) # F3 overlay, F4 frame CSV, F5 cProfile
+    manager.register("mainMenu", MainMenu) # these screens are built once and reused on every visit
+    manager.register("themeChoice", ThemeChoice)
+    manager.register("settingsMenu", SettingsMenu)
+    manager.register("leaderboardMenu", LeaderboardMenu)
+    if not deferServices: # otherwise the caller starts them once the first frame is showing
+        startServices(timer)
+    return manager
+
+def startServices(timer=None, path=database.DB_PATH): # the database, themes and puzzle generation, none of which the main menu needs
+    global db, themeStore, puzzlePool, puzzleCache, dailySeed
+    if db is not None:
+        return
+    timer = timer or PhaseTimer()
+    if settings.get('ServerUrl'): # a kiosk sharing puzzles and the leaderboard through server.py
+        from client import connectService
+        from puzzleCache import dailySeed
+        services = connectService(settings['ServerUrl'], settings.get('ServerTimeout', 5))
+        if services is not None:
+            db, themeStore, puzzlePool = services
+            puzzleCache = puzzlePool # the server stores the puzzles it hands out
+            timer.mark("puzzle server")
+            return
+    db = database.Database(path) # opened once for the whole session
+    timer.mark("database")
+    themeStore = ThemeStore(path) # imports themes.json the first time
+    timer.mark("theme store")
+    from puzzleCache import PuzzleCache, dailySeed # numpy is only needed once a game starts
+    from puzzlePool import PuzzlePool
+    timer.mark("generator import")
+    cacheBytes = settings.get('PuzzleCacheMB', 16) * 1024 * 1024 # stored puzzles, for replays and the daily puzzle
+    puzzleCache = PuzzleCache(themeStore.conn, cacheBytes)
+    puzzlePool = PuzzlePool(depth=settings.get('PregenDepth', 2), sampleWords=SAMPLE_WORDS, maxLength=MAX_WORD_LENGTH, path=path, cacheBytes=cacheBytes) # after the theme store, so the themes are imported
+    timer.mark("puzzle pool")
+
+def startSession(manager, timer=None, record=None, replay=None, realtime=False, path=database.DB_PATH): # startServices for recording the input to a file or playing a recording back
+    global dailySeed
+    from session import Recorder, Player
+    player = Player(replay, realtime) if replay else None
+    settings['PregenDepth'] = 0 # puzzles are made on the main thread from the seeded random, so a replay gets the same ones
+    settings['ServerUrl'] = "" # and from this database, a server's ready puzzles can't be replayed
+    startServices(timer, path)
+    seed = player.seed if player else random.randrange(2**32)
+    random.seed(seed) # the puzzles' seeds and the highlight colours
+    if player is not None:
+        manager.player = player
+        dailySeed = lambda: player.day # the daily puzzle of the day it was recorded
+    else:
+        manager.recorder = Recorder(record, seed, dailySeed())
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s") # so the instruments and pool can report
+    timer = PhaseTimer(startupStart)
+    manager = setup(timer)
+    manager.push("mainMenu")
+    manager.applyPending()
+    timer.mark("main menu")
+    manager.stack[-1].draw()
+    timer.mark("first frame")
+    firstFrame = timer.total()
+    record = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv else None # input saved to this file
+    replay = sys.argv[sys.argv.index("--replay") + 1] if "--replay" in sys.argv else None # or played back from it
+    replayDir = None
+    if replay:
+        replayDir = tempfile.mkdtemp() # a copy, so scores set by replays don't go on the real leaderboard
+        shutil.copy(database.DB_PATH, replayDir)
+        startSession(manager, timer, replay=replay, realtime="--realtime" in sys.argv, path=os.path.join(replayDir, os.path.basename(database.DB_PATH)))
+    elif record:
+        startSession(manager, timer, record=record)
+    else:
+        startServices(timer) # while the main menu is already on screen
+    if "--startup-profile" in sys.argv:
+        print(timer.report("startup profile"))
+        print(f"  time to first frame: {firstFrame * 1000:.1f} ms")
+    if "--cpu-report" in sys.argv:
+        manager.cpuMeter = CpuMeter()
+    manager.run()
+    if manager.cpuMeter is not None:
+        print(manager.cpuMeter.report())
+    if puzzlePool is not None:
+        puzzlePool.close()
+    if db is not None:
+        db.close() # writing any scores still queued
+    if manager.recorder is not None:
+        manager.recorder.close(manager.frame)
+    if replayDir is not None:
+        shutil.rmtree(replayDir, ignore_errors=True)
+    pygame.quit()
@@ -0,0 +1,153 @@
+import io
+import csv
+import time
+import logging
+import cProfile
+import pstats
+from collections import deque
+import pygame
+from fonts import getFont, textCache
+
+# Wall clock timing of named phases (the --startup-profile report), and of every frame's phases while the game runs
+
+log = logging.getLogger(__name__)
+
+class PhaseTimer:
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.last = self.start
+        self.phases = [] # (name, seconds) in the order they finished
+
+    def mark(self, name): # the time since the last mark belongs to this phase
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def total(self):
+        return self.last - self.start
+
+    def report(self, title="phases"):
+        width = max([len(name) for name, _ in self.phases] + [len("total")])
+        lines = [f"{title} (ms)"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<{width}}  {seconds * 1000:8.1f}")
+        lines.append(f"  {'total':<{width}}  {self.total() * 1000:8.1f}")
+        return "\n".join(lines)
+
+PHASES = ("events", "logic", "draw", "present", "idle")
+
+class FrameStats: # per phase times for the last few hundred frames
+    def __init__(self, maxFrames=600):
+        self.frames = deque(maxlen=maxFrames) # (frameNumber, events, logic, draw, present, idle, drawCalls), seconds
+        self.frameNumber = 0
+
+    def record(self, events, logic, draw, present, idle, drawCalls):
+        self.frameNumber += 1
+        self.frames.append((self.frameNumber, events, logic, draw, present, idle, drawCalls))
+
+    def frameTimes(self): # whole frame, idle included
+        return [sum(frame[1:6]) for frame in self.frames]
+
+    def getSummary(self):
+        if not self.frames:
+            return {"frames": 0}
+        times = sorted(self.frameTimes())
+        busy = sorted(sum(frame[1:5]) for frame in self.frames) # without the time spent waiting for the next frame
+        return {
+            "frames": len(times),
+            "fps": len(times) / sum(times) if sum(times) else 0,
+            "p50Ms": times[len(times) // 2] * 1000,
+            "p99Ms": times[min(len(times) - 1, int(len(times) * 0.99))] * 1000,
+            "busyP99Ms": busy[min(len(busy) - 1, int(len(busy) * 0.99))] * 1000,
+            "drawCalls": self.frames[-1][6],
+        }
+
+    def getHistogram(self, phase, edgesMs=(1, 2, 4, 8, 16, 33, 66)): # {"<1ms": n, ..., ">=66ms": n} for one phase
+        idx = PHASES.index(phase) + 1
+        counts = dict.fromkeys([f"<{edge}ms" for edge in edgesMs] + [f">={edgesMs[-1]}ms"], 0)
+        for frame in self.frames:
+            ms = frame[idx] * 1000
+            label = next((f"<{edge}ms" for edge in edgesMs if ms < edge), f">={edgesMs[-1]}ms")
+            counts[label] += 1
+        return counts
+
+    def dumpCsv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(("frame",) + tuple(f"{phase}Ms" for phase in PHASES) + ("drawCalls",))
+            for frame in self.frames:
+                writer.writerow((frame[0],) + tuple(round(value * 1000, 3) for value in frame[1:6]) + (frame[6],))
+
+class Instruments: # frame stats, the F3 overlay, F4 CSV dump and F5 cProfile toggle for a running game
+    HUD_KEY, CSV_KEY, PROFILE_KEY = pygame.K_F3, pygame.K_F4, pygame.K_F5
+
+    def __init__(self, window, showHud=False, maxFrames=600):
+        self.window = window
+        self.stats = FrameStats(maxFrames)
+        self.showHud = showHud
+        self.hudText = None # rendered overlay text, refreshed a few times a second
+        self.hudUpdated = 0
+        self.profiler = None # a running cProfile.Profile, if any
+
+    def handleEvent(self, event): # True if the event was one of the hotkeys, so the scene shouldn't get it
+        if event.type != pygame.KEYDOWN:
+            return False
+        if event.key == self.HUD_KEY:
+            self.showHud = not self.showHud
+        elif event.key == self.CSV_KEY:
+            path = time.strftime("frames-%Y%m%d-%H%M%S.csv")
+            self.stats.dumpCsv(path)
+            log.info("wrote the last %d frames to %s", len(self.stats.frames), path)
+        elif event.key == self.PROFILE_KEY:
+            self.toggleProfiler()
+        else:
+            return False
+        return True
+
+    def toggleProfiler(self):
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+            log.info("profiling started")
+            return
+        self.profiler.disable()
+        path = time.strftime("profile-%Y%m%d-%H%M%S.prof")
+        self.profiler.dump_stats(path) # for snakeviz / pstats
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(20)
+        log.info("profile written to %s\n%s", path, out.getvalue())
+        self.profiler = None
+
+    def drawHud(self):
+        if not self.showHud:
+            return
+        now = time.perf_counter()
+        if self.hudText is None or now - self.hudUpdated > 0.5:
+            summary = self.stats.getSummary()
+            text = f"FPS {summary.get('fps', 0):.0f}  p99 {summary.get('p99Ms', 0):.1f}ms  busy p99 {summary.get('busyP99Ms', 0):.1f}ms  draws {summary.get('drawCalls', 0)}"
+            self.hudText = textCache.render(text, getFont("Arial", 14), (255, 255, 0))
+            self.hudUpdated = now
+        rect = self.hudText.get_rect(bottomleft=(0, self.window.get_height())).inflate(8, 4)
+        self.window.fill((0, 0, 0), rect)
+        self.window.blit(self.hudText, (rect.x + 4, rect.y + 2))
+        pygame.display.update(rect) # drawn over whatever the scene drew this frame
+
+class CpuMeter: # CPU time against wall clock time for each scene, for --cpu-report
+    def __init__(self):
+        self.totals = {} # scene name -> [wall seconds, cpu seconds, frames]
+        self.lastWall = time.perf_counter()
+        self.lastCpu = time.process_time()
+
+    def record(self, sceneName): # everything since the last call is charged to this scene
+        wall, cpu = time.perf_counter(), time.process_time()
+        totals = self.totals.setdefault(sceneName, [0.0, 0.0, 0])
+        totals[0] += wall - self.lastWall
+        totals[1] += cpu - self.lastCpu
+        totals[2] += 1
+        self.lastWall, self.lastCpu = wall, cpu
+
+    def report(self):
+        lines = ["cpu per wall clock second, by scene", f"  {'scene':<16}  {'wall s':>8}  {'cpu s':>8}  {'cpu %':>6}  {'frames':>7}"]
+        for name, (wall, cpu, frames) in sorted(self.totals.items()):
+            lines.append(f"  {name:<16}  {wall:8.2f}  {cpu:8.2f}  {cpu / wall * 100 if wall else 0:6.1f}  {frames:7d}")
+        return "\n".join(lines)
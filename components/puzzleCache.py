@@ -0,0 +1,92 @@
+import json
+import time
+import zlib
+import random
+import hashlib
+import datetime
+from generator import Puzzle, generatePuzzle
+from themeStore import ThemeStore
+
+# Every puzzle comes from a seed plus (theme, the version of its words, grid size), and is kept in the Puzzles table
+# under a hash of those, so the daily puzzle and replays are a lookup. Least recently used puzzles go once the cache
+# is over its size, apart from ones with a score on the leaderboard.
+# Placement has a time budget, so on a slow machine a seed can very rarely come out differently, which is why a
+# score points at the stored puzzle rather than at its seed.
+
+FORMAT = 1 # goes up when generation changes, so puzzles made the old way are never handed out again
+
+SUM_SIZES = "SELECT COALESCE(SUM(size), 0) FROM Puzzles"
+EVICT = """DELETE FROM Puzzles WHERE key IN (
+    SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY lastUsed DESC, key) AS kept FROM Puzzles
+        WHERE NOT EXISTS (SELECT 1 FROM Players WHERE Players.puzzleKey = Puzzles.key))
+    WHERE kept > ?)""" # keeping the most recently used puzzles that fit
+
+def puzzleKey(theme, wordVersion, seed, size=None, sampleWords=20, maxLength=12, numWords=5): # the same inputs always give the same key
+    spec = json.dumps([FORMAT, theme, wordVersion, seed, size, sampleWords, maxLength, numWords], separators=(",", ":"))
+    return hashlib.sha256(spec.encode()).hexdigest()[:32]
+
+def dailySeed(day=None): # the same seed for everyone on the same date
+    day = day or datetime.date.today()
+    return int(day.strftime("%Y%m%d"))
+
+def makePuzzle(store, theme, seed, sampleWords=20, maxLength=12, size=None, numWords=5): # generating without the cache, the same puzzle getPuzzle would store for these inputs
+    words = store.sampleWords(theme, sampleWords, maxLength=maxLength, rng=random.Random(seed)) # the words come from the seed too
+    return generatePuzzle(words, seed=seed, size=size, numWords=numWords)
+
+workerStore = None # a worker process's own theme store, opened by startWorker
+
+def startWorker(path): # initializer for process pools that make puzzles with makeWorkerPuzzle
+    global workerStore
+    workerStore = ThemeStore(path, jsonPath=None)
+
+def makeWorkerPuzzle(theme, seed, sampleWords=20, maxLength=12, size=None, numWords=5): # makePuzzle from inside a pool worker
+    return makePuzzle(workerStore, theme, seed, sampleWords, maxLength, size, numWords)
+
+class PuzzleCache:
+    def __init__(self, conn, maxBytes=16 * 1024 * 1024):
+        self.conn = conn # a connection from database.connect, only used on the thread that made it
+        self.maxBytes = maxBytes # compressed puzzle data kept, not counting puzzles with a score
+        self.bytes = None # rough total of the stored data, re-read before evicting since other connections add to it
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key): # (themeName, puzzle) for a key, or None if it isn't stored
+        row = self.conn.execute("SELECT themeName, data FROM Puzzles WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self.conn:
+            self.conn.execute("UPDATE Puzzles SET lastUsed = ? WHERE key = ?", (time.time_ns(), key))
+        puzzle = Puzzle.fromDict(json.loads(zlib.decompress(row[1])))
+        puzzle.key = key
+        return row[0], puzzle
+
+    def put(self, key, themeName, puzzle):
+        data = zlib.compress(json.dumps(puzzle.toDict(), separators=(",", ":")).encode())
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO Puzzles(key, themeName, seed, data, size, lastUsed) VALUES (?, ?, ?, ?, ?, ?)", (key, themeName, puzzle.seed, data, len(data), time.time_ns()))
+        puzzle.key = key
+        if self.bytes is not None and self.bytes + len(data) <= self.maxBytes:
+            self.bytes += len(data)
+            return
+        self.bytes = self.conn.execute(SUM_SIZES).fetchone()[0]
+        if self.bytes > self.maxBytes:
+            self.evict(int(self.maxBytes * 0.9)) # a little under the cap, so it isn't evicting on every put
+
+    def evict(self, keepBytes):
+        with self.conn:
+            self.conn.execute(EVICT, (keepBytes,))
+        self.bytes = self.conn.execute(SUM_SIZES).fetchone()[0]
+
+    def getPuzzle(self, store, theme, seed, sampleWords=20, maxLength=12, size=None, numWords=5): # the stored puzzle for these inputs, generating and storing it the first time
+        key = puzzleKey(theme, store.getVersion(theme), seed, size, sampleWords, maxLength, numWords)
+        entry = self.get(key)
+        if entry is not None:
+            return entry[1]
+        puzzle = makePuzzle(store, theme, seed, sampleWords, maxLength, size, numWords)
+        self.put(key, theme, puzzle)
+        return puzzle
+
+    def getStats(self):
+        return {"hits": self.hits, "misses": self.misses, "bytes": self.bytes}
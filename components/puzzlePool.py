@@ -0,0 +1,105 @@
+import random
+import logging
+import threading
+from collections import deque, OrderedDict
+import database
+from themeStore import ThemeStore
+from puzzleCache import PuzzleCache
+
+# Puzzles generated ahead of time on a background thread, a few per theme, so starting a game only has to take one
+
+log = logging.getLogger(__name__)
+
+class PuzzlePool:
+    def __init__(self, depth=2, sampleWords=20, maxLength=12, maxThemes=64, path=database.DB_PATH, cacheBytes=16 * 1024 * 1024):
+        self.depth = depth # ready puzzles kept per theme, 0 turns the pool off
+        self.sampleWords = sampleWords # same as a game started without the pool
+        self.maxLength = maxLength
+        self.maxThemes = maxThemes # themes filled before anyone has played them
+        self.path = path
+        self.cacheBytes = cacheBytes # every puzzle made is also stored, so it can be replayed
+        self.ready = {} # theme -> deque of puzzles
+        self.wanted = OrderedDict() # themes to keep filled, in the order they were asked for
+        self.generations = {} # theme -> count of discards, so a puzzle made from old words is thrown away
+        self.cond = threading.Condition()
+        self.closed = False
+        self.hits = 0 # games started from a ready puzzle
+        self.misses = 0 # games that had to generate on the spot
+        self.latencies = deque(maxlen=1000) # seconds from clicking a theme to the first frame of the game
+        self.thread = None
+        if depth > 0:
+            self.thread = threading.Thread(target=self.run, name="PuzzlePool", daemon=True)
+            self.thread.start()
+
+    def prime(self, themes): # starting to fill some themes before they are clicked
+        with self.cond:
+            for theme in themes:
+                if len(self.wanted) >= self.maxThemes:
+                    break
+                self.wanted.setdefault(theme, None)
+            self.cond.notify()
+
+    def take(self, theme): # a ready puzzle, or None if there isn't one yet
+        with self.cond:
+            self.wanted.setdefault(theme, None) # played themes are always kept filled
+            self.cond.notify() # refilling what this takes
+            if self.ready.get(theme):
+                self.hits += 1
+                return self.ready[theme].popleft()
+            self.misses += 1
+            return None
+
+    def discard(self, theme): # the theme's words changed, so its ready puzzles are out of date
+        with self.cond:
+            self.ready.pop(theme, None)
+            self.generations[theme] = self.generations.get(theme, 0) + 1
+            self.cond.notify()
+
+    def nextTheme(self): # the first wanted theme that isn't full, called with the lock held
+        for theme in self.wanted:
+            if len(self.ready.get(theme, ())) < self.depth:
+                return theme
+        return None
+
+    def run(self):
+        store = ThemeStore(self.path, jsonPath=None) # its own connection, sqlite connections stay on one thread
+        cache = PuzzleCache(store.conn, self.cacheBytes)
+        while True:
+            with self.cond:
+                theme = self.nextTheme()
+                while theme is None and not self.closed:
+                    self.cond.wait()
+                    theme = self.nextTheme()
+                if self.closed:
+                    break
+                generation = self.generations.get(theme, 0)
+
+            try:
+                puzzle = cache.getPuzzle(store, theme, random.randrange(2**32), self.sampleWords, self.maxLength)
+            except Exception:
+                log.exception("could not pre-generate a puzzle for %r", theme)
+                with self.cond:
+                    self.wanted.pop(theme, None) # leaving it to the game to try, and show the error, on the spot
+                continue
+
+            with self.cond:
+                if self.generations.get(theme, 0) == generation:
+                    self.ready.setdefault(theme, deque()).append(puzzle)
+        store.close()
+
+    def recordLatency(self, seconds):
+        self.latencies.append(seconds)
+
+    def getStats(self): # hit rate and click to first frame percentiles over the recent games
+        latencies = sorted(self.latencies)
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else None
+        return {"hits": self.hits, "misses": self.misses, "games": len(latencies), "p50Ms": percentile(0.5), "p99Ms": percentile(0.99)}
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+            log.info("puzzle pool stats: %s", self.getStats())
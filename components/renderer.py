@@ -0,0 +1,80 @@
+import time
+import pygame
+
+# Retained mode drawing: widgets flag themselves dirty, and only the areas they cover get redrawn and pushed to the display
+
+_staticLayers = {} # key -> surface of lines etc. that never change while a screen is open
+frameCounters = {"drawCalls": 0, "presentSeconds": 0.0} # added to while drawing, read and reset once a frame by the frame stats
+
+def getStaticLayer(key, size, build): # building a transparent layer once with build(surface), then reusing it
+    if key not in _staticLayers:
+        layer = pygame.Surface(size, pygame.SRCALPHA)
+        build(layer)
+        _staticLayers[key] = layer
+    return _staticLayers[key]
+
+def clearStaticLayers(): # e.g. when the colour theme changes
+    _staticLayers.clear()
+
+class Renderer:
+    def __init__(self, window, background, dirtyRects=True):
+        self.window = window
+        self.background = background # colour behind every widget
+        self.dirtyRects = dirtyRects # False redraws everything every frame, like before
+        self.fullRedraw = True # the first frame always draws everything
+        self.pending = [] # extra areas to repaint, e.g. where a widget was removed
+
+    def invalidate(self, background=None): # redraw everything next frame, e.g. after the colour theme changes
+        if background is not None:
+            self.background = background
+        self.fullRedraw = True
+
+    def markArea(self, rect): # repaint an area that no widget is flagged for
+        if rect:
+            self.pending.append(pygame.Rect(rect))
+
+    def draw(self, widgets, overlay=None): # widgets in draw order, overlay is a static layer drawn over them
+        if self.fullRedraw or not self.dirtyRects:
+            self.window.fill(self.background)
+            for widget in widgets:
+                widget.draw()
+                widget.drawnRect = widget.getRect()
+                widget.dirty = False
+            frameCounters["drawCalls"] += len(widgets)
+            if overlay is not None:
+                self.window.blit(overlay, (0, 0))
+            present(None)
+            self.fullRedraw = False
+            self.pending = []
+            return
+
+        areas = self.pending
+        self.pending = []
+        for widget in widgets:
+            if widget.dirty:
+                rect = widget.getRect()
+                areas.append(rect.union(widget.drawnRect) if widget.drawnRect else rect) # covering where it was drawn last time too
+                widget.drawnRect = rect
+                widget.dirty = False
+        if not areas:
+            return # nothing changed, nothing to draw
+
+        rects = [widget.drawnRect or widget.getRect() for widget in widgets]
+        for area in areas:
+            self.window.set_clip(area) # redrawing everything that overlaps the area, clipped to it
+            self.window.fill(self.background, area)
+            for idx in area.collidelistall(rects):
+                widgets[idx].draw()
+                frameCounters["drawCalls"] += 1
+            if overlay is not None:
+                self.window.blit(overlay, area.topleft, area)
+        self.window.set_clip(None)
+        present(areas)
+
+def present(areas): # pushing the drawn areas (or the whole window for None) to the screen, timed for the frame stats
+    start = time.perf_counter()
+    if areas is None:
+        pygame.display.flip()
+    else:
+        pygame.display.update(areas)
+    frameCounters["presentSeconds"] += time.perf_counter() - start
@@ -0,0 +1,189 @@
+import time
+import pygame
+from renderer import frameCounters
+
+# Every screen is a Scene on a stack, run by one main loop instead of each menu calling the next one's loop
+
+class Scene:
+    caption = "" # window title while the scene is showing
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.name = None # set when the manager builds it from a registered name, so it can be reused
+
+    def enter(self): # called every time the scene comes to the top of the stack
+        pygame.display.set_caption(self.caption)
+
+    def exit(self): # called when another scene covers it or it is removed
+        pass
+
+    def handleEvent(self, event):
+        pass
+
+    def update(self): # game logic once per frame
+        pass
+
+    def draw(self):
+        pass
+
+    def redraw(self): # the window's contents were lost, e.g. it was uncovered
+        pass
+
+    def getWakeDelay(self): # seconds until the scene next changes by itself, 0 if it's animating, None if only input changes it
+        return None
+
+class SceneManager:
+    def __init__(self, clock, fps, colourScheme):
+        self.clock = clock
+        self.fps = fps
+        self.colourScheme = colourScheme # [scheme dict], shared by every scene
+        self.stack = []
+        self.factories = {} # name -> function(manager) that builds the scene
+        self.cache = {} # name -> the built scene, reused on every visit
+        self.pending = None # transition requested during this frame
+        self.instruments = None # profiling.Instruments, to time every frame
+        self.cpuMeter = None # profiling.CpuMeter, for the CPU used by each scene
+        self.wokenBy = None # the event that ended the last wait, handled at the start of the next frame
+        self.idleWait = True # False redraws every frame even when nothing changes, for benchmarks
+        self.frame = 0 # frames run so far, what recorded input is matched up by
+        self.recorder = None # session.Recorder, saving the input of every frame
+        self.player = None # session.Player, feeding recorded input instead of the user's
+        self.running = True
+
+    def register(self, name, factory):
+        self.factories[name] = factory
+
+    def scene(self, name): # the cached scene for a name, building it the first time
+        if name not in self.cache:
+            self.cache[name] = self.factories[name](self)
+            self.cache[name].name = name
+        return self.cache[name]
+
+    def getTop(self):
+        return self.stack[-1] if self.stack else None
+
+    # transitions only take effect after the current event, so a scene is never swapped out half way through handling one
+    def push(self, scene): # scene can be a Scene or a registered name
+        self.pending = ("push", scene)
+
+    def pop(self):
+        self.pending = ("pop", None)
+
+    def replace(self, scene):
+        self.pending = ("replace", scene)
+
+    def popToRoot(self): # back to the bottom scene (the main menu)
+        self.pending = ("root", None)
+
+    def quit(self):
+        self.running = False
+
+    def applyPending(self):
+        if self.pending is None:
+            return
+        action, scene = self.pending
+        self.pending = None
+        if isinstance(scene, str):
+            scene = self.scene(scene)
+
+        if self.stack:
+            self.stack[-1].exit()
+        if action == "push":
+            self.stack.append(scene)
+        elif action == "pop":
+            self.stack.pop()
+        elif action == "replace":
+            self.stack[-1] = scene
+        elif action == "root":
+            del self.stack[1:]
+        if self.stack:
+            self.stack[-1].enter()
+        else:
+            self.running = False
+
+    def setColourScheme(self, colourScheme): # rebuilding the cached scenes in the new colours
+        self.colourScheme = colourScheme
+        self.cache.clear()
+        for idx, scene in enumerate(self.stack[:-1]): # the top scene updates itself
+            if scene.name:
+                self.stack[idx] = self.scene(scene.name)
+        top = self.getTop()
+        if top is not None and top.name:
+            self.cache[top.name] = top
+
+    def step(self): # one frame: events, logic, drawing, then waiting for the next frame
+        start = time.perf_counter()
+        frameCounters["drawCalls"] = 0
+        frameCounters["presentSeconds"] = 0.0
+        if self.player is not None:
+            if self.frame >= self.player.frames: # the recording is over
+                self.quit()
+                return
+            pygame.event.pump() # keeping a real window responsive, its input is ignored
+            events = self.player.getEvents(self.frame)
+        else:
+            events = pygame.event.get()
+            if self.wokenBy is not None:
+                events.insert(0, self.wokenBy)
+                self.wokenBy = None
+            for event in events:
+                if event.type == pygame.MOUSEWHEEL: # wheel events don't say where the mouse was, so scenes and recordings get it here
+                    event.pos = pygame.mouse.get_pos()
+        if self.recorder is not None:
+            self.recorder.record(self.frame, events)
+        self.frame += 1
+        for event in events:
+            if event.type == pygame.QUIT: # allowing the user to quit the window
+                self.quit()
+                return
+            if event.type == pygame.VIDEOEXPOSE:
+                self.stack[-1].redraw()
+            if self.instruments is not None and self.instruments.handleEvent(event):
+                continue # F3 / F4 / F5 are for the instruments, not the scene
+            self.stack[-1].handleEvent(event)
+            self.applyPending()
+            if not self.running:
+                return
+        eventsDone = time.perf_counter()
+
+        self.stack[-1].update()
+        self.applyPending()
+        if not self.running:
+            return
+        logicDone = time.perf_counter()
+
+        self.stack[-1].draw()
+        if self.instruments is not None:
+            self.instruments.drawHud()
+        drawDone = time.perf_counter()
+
+        self.waitForNextFrame()
+        if self.cpuMeter is not None:
+            self.cpuMeter.record(type(self.stack[-1]).__name__)
+        if self.instruments is not None:
+            present = frameCounters["presentSeconds"]
+            self.instruments.stats.record(eventsDone - start, logicDone - eventsDone, drawDone - logicDone - present, present, time.perf_counter() - drawDone, frameCounters["drawCalls"])
+
+    def waitForNextFrame(self): # sleeping until input or the scene's next change, and never going over fps
+        if self.player is not None: # recorded input doesn't wait, the player keeps the pace if it's in real time
+            self.clock.tick()
+            return
+        delay = self.stack[-1].getWakeDelay() if self.idleWait else 0
+        if self.instruments is not None and self.instruments.showHud:
+            delay = 0.5 if delay is None else min(delay, 0.5) # keeping the overlay's numbers moving
+        if delay is None:
+            event = pygame.event.wait() # nothing to do until the user does something
+        elif delay > 0:
+            event = pygame.event.wait(max(1, int(delay * 1000))) # 0 would mean wait forever
+        else:
+            event = None
+        if event is not None and event.type != pygame.NOEVENT:
+            self.wokenBy = event
+        self.clock.tick(self.fps) # returns straight away after a long wait, caps the rate when events keep coming
+
+    def run(self, scene=None): # scene is pushed first, unless one is already on the stack
+        if scene is not None:
+            self.push(scene)
+            self.applyPending()
+        while self.running:
+            self.step()
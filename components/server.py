@@ -0,0 +1,266 @@
+import sys
+import json
+import random
+import signal
+import asyncio
+import logging
+import argparse
+from collections import deque
+from urllib.parse import urlsplit, parse_qs, unquote
+from concurrent.futures import ProcessPoolExecutor
+import database
+from themeStore import ThemeStore
+from puzzleCache import PuzzleCache, puzzleKey, startWorker, makeWorkerPuzzle
+
+# One puzzle and score service for several kiosks, so they share a leaderboard and none of them generate puzzles.
+# A small HTTP/1.1 server on asyncio with JSON bodies and keep-alive connections, standard library only:
+#   GET    /themes                              theme names
+#   POST   /themes         {"name", "words"}    adding or replacing a theme
+#   GET    /puzzle?theme=T[&seed=S][&size=N]    a ready puzzle, or the one for a seed
+#   GET    /puzzles/KEY                         a stored puzzle, for replays
+#   GET    /scores?limit=N[&theme=T]            the fastest scores
+#   POST   /scores         {"scores": [...]}    queuing [username, themeName, timeMs, puzzleKey] rows
+#   DELETE /scores
+#   GET    /stats
+# Generation runs in worker processes. Everything else runs on the event loop, where each SQLite call takes well under
+# a millisecond. Scores go through the same ScoreWriter as the game's, many to a transaction. So a score shows on the
+# board once the writer commits it, a moment after its POST returns. Run from the repo root:
+#   python components/server.py --port 8765
+# and set "ServerUrl": "http://127.0.0.1:8765" in each kiosk's settings.json
+
+log = logging.getLogger(__name__)
+
+MAX_BODY = 1024 * 1024 # bytes, a batch of scores or a theme's words
+MAX_NAME = 40 # characters in a theme name, the Themes.name column is VARCHAR(40)
+MAX_GRID_SIZE = 1000 # the biggest grid a client can ask for, the largest the viewport benchmarks play
+MAX_SCORES = 1000 # rows a leaderboard request gets at most
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def puzzleReply(themeName, puzzle):
+    return {"themeName": themeName, "key": puzzle.key, "puzzle": puzzle.toDict()}
+
+class PuzzleServer:
+    def __init__(self, path=database.DB_PATH, depth=4, workers=None, sampleWords=20, maxLength=12, cacheBytes=64 * 1024 * 1024):
+        self.path = path
+        self.depth = depth # ready puzzles kept per theme
+        self.sampleWords = sampleWords # same as the game
+        self.maxLength = maxLength
+        self.db = database.Database(path) # migrating first, its writer thread batches the scores
+        self.store = ThemeStore(path) # imports themes.json the first time
+        self.cache = PuzzleCache(self.store.conn, cacheBytes)
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=startWorker, initargs=(path,))
+        self.ready = {} # theme -> deque of puzzles
+        self.refilling = set() # themes with a refill running
+        self.inflight = {} # puzzle key -> future, so clients asking for the same seed at once share one generation
+        self.requests = 0
+        self.hits = 0 # puzzles handed out ready
+        self.misses = 0 # puzzles generated while the client waited
+
+    async def generate(self, theme, seed, size=None): # the stored puzzle for these inputs, made in a worker the first time
+        key = puzzleKey(theme, self.store.getVersion(theme), seed, size, self.sampleWords, self.maxLength)
+        if key in self.inflight:
+            return await asyncio.shield(self.inflight[key])
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry[1]
+        future = asyncio.get_running_loop().run_in_executor(self.pool, makeWorkerPuzzle, theme, seed, self.sampleWords, self.maxLength, size)
+        self.inflight[key] = future
+        try:
+            puzzle = await future
+        finally:
+            del self.inflight[key]
+        self.cache.put(key, theme, puzzle)
+        return puzzle
+
+    async def refill(self, theme):
+        self.refilling.add(theme)
+        try:
+            ready = self.ready.setdefault(theme, deque())
+            while len(ready) < self.depth:
+                puzzle = await self.generate(theme, random.randrange(2**32))
+                if self.ready.get(theme) is not ready: # the theme changed while this was made
+                    break
+                ready.append(puzzle)
+        except Exception:
+            log.exception("could not pre-generate a puzzle for %r", theme)
+        finally:
+            self.refilling.discard(theme)
+
+    async def takePuzzle(self, theme): # a ready one if there is one, then topping the theme back up
+        ready = self.ready.get(theme)
+        if ready:
+            self.hits += 1
+            puzzle = ready.popleft()
+        else:
+            self.misses += 1
+            puzzle = await self.generate(theme, random.randrange(2**32))
+        if theme not in self.refilling:
+            asyncio.get_running_loop().create_task(self.refill(theme))
+        return puzzle
+
+    def checkTheme(self, theme):
+        if theme not in self.store.getNames():
+            raise HttpError(404, f"no such theme: {theme}")
+
+    async def route(self, method, path, query, body): # (status, reply)
+        if path == "/themes":
+            if method == "GET":
+                return 200, {"names": self.store.getNames()}
+            if method == "POST":
+                if not isinstance(body.get("name"), str) or not isinstance(body.get("words"), list) or not all(isinstance(word, str) for word in body["words"]):
+                    raise HttpError(400, "expected a name and a list of words")
+                if not 0 < len(body["name"]) <= MAX_NAME:
+                    raise HttpError(400, f"theme names are 1 to {MAX_NAME} characters")
+                self.store.addTheme(body["name"], body["words"])
+                self.ready.pop(body["name"], None) # puzzles made from the old words
+                return 200, {"ok": True}
+        elif path == "/puzzle" and method == "GET":
+            theme = query.get("theme")
+            self.checkTheme(theme)
+            try:
+                seed = int(query["seed"]) if "seed" in query else None
+                size = int(query["size"]) if "size" in query else None
+            except ValueError:
+                raise HttpError(400, "seed and size are whole numbers")
+            if size is not None and not 1 <= size <= MAX_GRID_SIZE:
+                raise HttpError(400, f"size is from 1 to {MAX_GRID_SIZE}")
+            try:
+                if seed is None and size is None:
+                    puzzle = await self.takePuzzle(theme)
+                else:
+                    puzzle = await self.generate(theme, random.randrange(2**32) if seed is None else seed, size)
+            except ValueError as error: # a theme without usable words, or words that don't fit a grid that size
+                raise HttpError(400, str(error))
+            return 200, puzzleReply(theme, puzzle)
+        elif path.startswith("/puzzles/") and method == "GET":
+            entry = self.cache.get(path[len("/puzzles/"):])
+            if entry is None:
+                raise HttpError(404, "that puzzle is no longer stored")
+            return 200, puzzleReply(*entry)
+        elif path == "/scores":
+            if method == "GET":
+                try:
+                    limit = min(int(query.get("limit", 8)), MAX_SCORES)
+                except ValueError:
+                    raise HttpError(400, "limit is a whole number")
+                if limit < 1: # SQLite takes LIMIT -1 as no limit at all
+                    raise HttpError(400, "limit is at least 1")
+                return 200, {"scores": database.topScores(self.db.conn, limit, query.get("theme"))} # the writer's commits are seen straight away, no flush
+            if method == "POST":
+                scores = body.get("scores")
+                try:
+                    rows = [(str(username), str(themeName), int(timeMs), key if isinstance(key, str) else None) for username, themeName, timeMs, key in scores]
+                except (TypeError, ValueError):
+                    raise HttpError(400, "expected scores as [username, themeName, timeMs, puzzleKey] rows")
+                for row in rows: # all or none of a batch is queued
+                    self.db.submitScore(*row)
+                return 202, {"queued": len(scores)}
+            if method == "DELETE":
+                await asyncio.get_running_loop().run_in_executor(None, self.db.wipeScores) # waits for the writer
+                return 200, {"ok": True}
+        elif path == "/stats" and method == "GET":
+            return 200, {"requests": self.requests, "hits": self.hits, "misses": self.misses, "written": self.db.writer.written, "cache": self.cache.getStats()}
+        else:
+            raise HttpError(404, f"nothing at {path}")
+        raise HttpError(405, f"{method} isn't supported for {path}")
+
+    async def readRequest(self, reader): # (method, path, query, body, keepAlive), or None once the client hangs up
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "bad request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HttpError(400, "bad Content-Length")
+        if length > MAX_BODY:
+            raise HttpError(413, "body too big")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        keepAlive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        return method, unquote(url.path), query, body, keepAlive
+
+    async def handle(self, reader, writer): # one client connection, any number of requests
+        try:
+            while True:
+                keepAlive = False
+                try:
+                    request = await self.readRequest(reader)
+                    if request is None:
+                        break
+                    method, path, query, body, keepAlive = request
+                    self.requests += 1
+                    try:
+                        body = json.loads(body) if body else {}
+                    except ValueError:
+                        raise HttpError(400, "body isn't JSON")
+                    if not isinstance(body, dict):
+                        raise HttpError(400, "body isn't a JSON object")
+                    status, reply = await self.route(method, path, query, body)
+                except HttpError as error:
+                    status, reply = error.status, {"error": str(error)}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception:
+                    log.exception("failed to handle a request")
+                    status, reply = 500, {"error": "internal error"}
+                data = json.dumps(reply, separators=(",", ":")).encode()
+                writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n%s\r\n" % (status, STATUS_TEXT[status].encode(), len(data), b"" if keepAlive else b"Connection: close\r\n") + data)
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024) # hundreds of kiosks can connect at once
+        if sys.platform != "win32": # no signal handlers on Windows event loops
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel) # stopping as Ctrl+C does, so queued scores are written
+        for theme in self.store.getNames():
+            asyncio.get_running_loop().create_task(self.refill(theme)) # every theme has puzzles ready before the first request
+        log.info("serving puzzles and scores on http://%s:%d", host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.db.close() # writing any scores still queued
+        self.store.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="serve puzzles and a shared leaderboard to the kiosks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default=database.DB_PATH)
+    parser.add_argument("--depth", type=int, default=4, help="ready puzzles kept per theme")
+    parser.add_argument("--workers", type=int, default=None, help="generation processes, one per core by default")
+    args = parser.parse_args()
+
+    server = PuzzleServer(args.db, depth=args.depth, workers=args.workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        server.close()
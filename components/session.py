@@ -0,0 +1,95 @@
+import time
+import struct
+import pygame
+
+# Input recorded to a small binary file with the frame it was handled in, and played back through the same scenes, so
+# a session can be run again headless as a repeatable end to end benchmark. A header with the random seed and the day
+# for the daily puzzle, then one fixed size record per event and an END record holding how many frames the session ran.
+# Only the events the scenes look at are kept, and the game makes its puzzles on the main thread while recording or
+# replaying, so the same clicks land on the same letters. The leaderboard shows whatever scores the database has, so
+# sessions that click its rows are best replayed against the database they were recorded on.
+# Record with --record PATH, play back with --replay PATH (--realtime to keep the recorded pace instead of going as fast
+# as possible), or time a replay with benchmarks/benchReplay.py
+
+MAGIC = b"WSRS"
+VERSION = 1
+HEADER = struct.Struct("<4sBII") # magic, version, seed, day as YYYYMMDD
+RECORD = struct.Struct("<IIBhhiiI") # frame, ms since the start, type, x, y, a, b, c
+END = 255 # type of the last record, its frame is the session's length
+
+EVENT_CODES = {pygame.MOUSEBUTTONDOWN: 1, pygame.MOUSEBUTTONUP: 2, pygame.MOUSEMOTION: 3, pygame.MOUSEWHEEL: 4, pygame.KEYDOWN: 5, pygame.KEYUP: 6, pygame.QUIT: 7, pygame.VIDEOEXPOSE: 8}
+EVENT_TYPES = {code: eventType for eventType, code in EVENT_CODES.items()}
+
+def packEvent(event): # (x, y, a, b, c) for a record
+    if event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        return event.pos[0], event.pos[1], event.button, 0, 0
+    if event.type == pygame.MOUSEMOTION:
+        return event.pos[0], event.pos[1], event.rel[0], event.rel[1], sum(1 << idx for idx, down in enumerate(event.buttons) if down)
+    if event.type == pygame.MOUSEWHEEL: # pos is added by the manager, the viewport zooms around it
+        return event.pos[0], event.pos[1], event.y, event.x, 0
+    if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+        return 0, 0, event.key, event.mod, ord(event.unicode) if getattr(event, "unicode", "") else 0
+    return 0, 0, 0, 0, 0
+
+def unpackEvent(code, x, y, a, b, c):
+    eventType = EVENT_TYPES[code]
+    if eventType in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        return pygame.event.Event(eventType, pos=(x, y), button=a)
+    if eventType == pygame.MOUSEMOTION:
+        return pygame.event.Event(eventType, pos=(x, y), rel=(a, b), buttons=tuple(bool(c >> idx & 1) for idx in range(3)))
+    if eventType == pygame.MOUSEWHEEL:
+        return pygame.event.Event(eventType, pos=(x, y), y=a, x=b, flipped=False)
+    if eventType == pygame.KEYDOWN:
+        return pygame.event.Event(eventType, key=a, mod=b, unicode=chr(c) if c else "", scancode=0)
+    if eventType == pygame.KEYUP:
+        return pygame.event.Event(eventType, key=a, mod=b, scancode=0)
+    return pygame.event.Event(eventType)
+
+class Recorder:
+    def __init__(self, path, seed, day):
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, day))
+        self.start = time.perf_counter()
+
+    def record(self, frame, events): # the events handled in one frame, in order
+        ms = int((time.perf_counter() - self.start) * 1000)
+        for event in events:
+            code = EVENT_CODES.get(event.type)
+            if code is not None:
+                self.file.write(RECORD.pack(frame, ms, code, *packEvent(event)))
+
+    def close(self, frames):
+        if self.file.closed:
+            return
+        self.file.write(RECORD.pack(frames, int((time.perf_counter() - self.start) * 1000), END, 0, 0, 0, 0, 0))
+        self.file.close()
+
+class Player:
+    def __init__(self, path, realtime=False):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, self.seed, self.day = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} isn't a version {VERSION} session recording")
+        self.realtime = realtime # waiting until each frame's events were recorded, instead of as fast as possible
+        self.frames = None # how many frames the session ran, None if it wasn't closed properly
+        self.events = {} # frame -> (ms, [events])
+        records = data[HEADER.size:]
+        for frame, ms, code, x, y, a, b, c in RECORD.iter_unpack(records[:len(records) - len(records) % RECORD.size]): # a game that crashed can leave half a record
+            if code == END:
+                self.frames = frame
+                break
+            self.events.setdefault(frame, (ms, []))[1].append(unpackEvent(code, x, y, a, b, c))
+        if self.frames is None:
+            self.frames = max(self.events, default=-1) + 1
+        self.start = None
+
+    def getEvents(self, frame): # the events recorded for a frame, a new list each time
+        if self.start is None:
+            self.start = time.perf_counter()
+        if frame not in self.events:
+            return []
+        ms, events = self.events[frame]
+        if self.realtime:
+            time.sleep(max(0.0, self.start + ms / 1000 - time.perf_counter()))
+        return list(events)
@@ -0,0 +1,17 @@
+# Uniform grid of buckets so a click only has to be checked against the widgets near it
+
+class SpatialIndex:
+    def __init__(self, items=(), bucketSize=64):
+        self.bucketSize = bucketSize # size of each bucket in pixels
+        self.buckets = {} # (bucketX, bucketY) -> items overlapping that bucket, in the order they were added
+        for item in items:
+            self.insert(item)
+
+    def insert(self, item, geo=None): # geo defaults to the item's own geo (x, y, w, h)
+        x, y, w, h = geo if geo is not None else item.geo
+        for bx in range(int(x // self.bucketSize), int((x + w) // self.bucketSize) + 1):
+            for by in range(int(y // self.bucketSize), int((y + h) // self.bucketSize) + 1):
+                self.buckets.setdefault((bx, by), []).append(item)
+
+    def query(self, point): # items whose bucket the point falls in, callers still check their exact bounds
+        return self.buckets.get((int(point[0] // self.bucketSize), int(point[1] // self.bucketSize)), [])
@@ -0,0 +1,160 @@
+import os
+import json
+import random
+import database
+
+# Themes live in the Themes / Words tables of database.db. Names are cached, and each theme's words are
+# loaded the first time they are needed, until another connection adds or replaces a theme.
+# Words are also indexed by (length, ordinal), so a few words can be drawn from a huge theme without reading it all
+
+JSON_PATH = 'components/themes.json'
+
+class ThemeStore:
+    def __init__(self, path=database.DB_PATH, jsonPath=JSON_PATH):
+        self.conn = database.connect(path)
+        self.names = None # theme names in the order they were added, None until loaded
+        self.words = {} # theme name -> list of words, filled in as themes are played
+        self.buckets = {} # theme name -> (themeId, {length: number of words that long})
+        self.version = 0 # goes up whenever the cached themes change, so screens know to rebuild
+        self.dataVersion = None # SQLite's data_version when the cache was last checked
+        self.themesStamp = None # (themes, newest id, sum of versions) when the cache was filled
+        if jsonPath and self.conn.execute("SELECT COUNT(*) FROM Themes").fetchone()[0] == 0 and os.path.exists(jsonPath):
+            self.importJson(jsonPath) # first run with this database, bringing the old themes file across
+
+    def importJson(self, jsonPath=JSON_PATH): # adding every theme in an old style themes.json in one transaction
+        with open(jsonPath, 'r') as f:
+            themes = json.load(f)
+        with self.conn:
+            for name, words in themes.items():
+                self.writeTheme(name, words)
+        self.invalidate()
+        self.themesStamp = self.readThemesStamp()
+
+    def invalidate(self):
+        self.names = None
+        self.words = {}
+        self.buckets = {}
+        self.version += 1
+
+    def readThemesStamp(self): # changes when a theme is added or its words are replaced, not when scores or puzzles are written
+        return self.conn.execute("SELECT COUNT(*), MAX(id), TOTAL(version) FROM Themes").fetchone()
+
+    def checkFresh(self): # data_version only changes when a different connection commits, anything from a score up
+        dataVersion = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if dataVersion != self.dataVersion:
+            self.dataVersion = dataVersion
+            themesStamp = self.readThemesStamp()
+            if themesStamp != self.themesStamp:
+                if self.themesStamp is not None:
+                    self.invalidate()
+                self.themesStamp = themesStamp
+
+    def getNames(self):
+        self.checkFresh()
+        if self.names is None:
+            self.names = [name for name, in self.conn.execute("SELECT name FROM Themes ORDER BY id")]
+        return self.names
+
+    def isRefreshing(self): # the names are always read straight from the database, only the server's stand-in fetches them in the background
+        return False
+
+    def getWords(self, name):
+        self.checkFresh()
+        if name not in self.words:
+            rows = self.conn.execute("SELECT word FROM Words WHERE themeId = (SELECT id FROM Themes WHERE name = ?) ORDER BY position", (name,))
+            self.words[name] = [word for word, in rows]
+        return self.words[name]
+
+    def getBuckets(self, name): # how many words of each length a theme has, read off the index
+        self.checkFresh()
+        if name not in self.buckets:
+            row = self.conn.execute("SELECT id FROM Themes WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                raise ValueError(f"no such theme: {name}")
+            themeId = row[0]
+            counts = {}
+            length = self.conn.execute("SELECT MIN(length) FROM Words WHERE themeId = ?", (themeId,)).fetchone()[0]
+            while length is not None: # one index lookup per distinct length rather than a scan of every word
+                counts[length] = self.conn.execute("SELECT MAX(ordinal) FROM Words WHERE themeId = ? AND length = ?", (themeId, length)).fetchone()[0] + 1
+                length = self.conn.execute("SELECT MIN(length) FROM Words WHERE themeId = ? AND length > ?", (themeId, length)).fetchone()[0]
+            self.buckets[name] = (themeId, counts)
+        return self.buckets[name]
+
+    def sampleWords(self, name, k, maxLength=None, rng=random): # k different words no longer than maxLength, in O(k) lookups
+        themeId, counts = self.getBuckets(name)
+        lengths = [length for length in sorted(counts) if maxLength is None or length <= maxLength]
+        total = sum(counts[length] for length in lengths)
+        picked = set() # (length, ordinal) already drawn
+        words = []
+        while len(words) < min(k, total):
+            pick = rng.randrange(total) # a random word out of every word that fits, then finding its bucket
+            for length in lengths:
+                if pick < counts[length]:
+                    break
+                pick -= counts[length]
+            if (length, pick) in picked:
+                continue
+            picked.add((length, pick))
+            words.append(self.conn.execute("SELECT word FROM Words WHERE themeId = ? AND length = ? AND ordinal = ?", (themeId, length, pick)).fetchone()[0])
+        return words
+
+    def getVersion(self, name): # changes whenever the theme's words are replaced, so cached puzzles made from the old words aren't used
+        row = self.conn.execute("SELECT version FROM Themes WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def clearTheme(self, name): # the id of a theme with no words, creating it if needed, the caller commits
+        row = self.conn.execute("SELECT id FROM Themes WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return self.conn.execute("INSERT INTO Themes(name) VALUES (?)", (name,)).lastrowid
+        self.conn.execute("DELETE FROM Words WHERE themeId = ?", (row[0],))
+        self.conn.execute("UPDATE Themes SET version = version + 1 WHERE id = ?", (row[0],))
+        return row[0]
+
+    def writeTheme(self, name, words): # replacing the words of a theme that already exists, the caller commits
+        themeId = self.clearTheme(name)
+        ordinals = {} # length -> how many words of that length so far
+        rows = []
+        for idx, word in enumerate(dict.fromkeys(words)): # dropping repeats, keeping the order
+            ordinals[len(word)] = ordinals.get(len(word), -1) + 1
+            rows.append((themeId, idx, word, len(word), ordinals[len(word)]))
+        self.conn.executemany("INSERT INTO Words(themeId, position, word, length, ordinal) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def addTheme(self, name, words): # all or nothing, a crash half way leaves the old themes as they were
+        with self.conn:
+            self.writeTheme(name, words)
+        if self.names is not None and name not in self.names:
+            self.names.append(name)
+        self.words[name] = list(dict.fromkeys(words))
+        self.buckets.pop(name, None)
+        self.version += 1
+        self.themesStamp = self.readThemesStamp() # this connection's own change is already in the cache
+
+    def importWords(self, name, words, batchSize=10000): # streaming any number of words into a theme, replacing it, returns (kept, repeats)
+        seen = 0
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS ImportWords ( word VARCHAR(40) NOT NULL UNIQUE, length INTEGER NOT NULL )") # repeats are dropped here, on disk rather than in a set
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.execute("DELETE FROM ImportWords")
+            themeId = self.clearTheme(name)
+            batch = []
+            for word in words:
+                batch.append((word, len(word)))
+                if len(batch) >= batchSize:
+                    self.conn.executemany("INSERT OR IGNORE INTO ImportWords(word, length) VALUES (?, ?)", batch)
+                    seen += len(batch)
+                    batch = []
+            self.conn.executemany("INSERT OR IGNORE INTO ImportWords(word, length) VALUES (?, ?)", batch)
+            seen += len(batch)
+            kept = self.conn.execute("""INSERT INTO Words(themeId, position, word, length, ordinal)
+                SELECT ?, rowid - 1, word, length, ROW_NUMBER() OVER (PARTITION BY length ORDER BY rowid) - 1 FROM ImportWords""", (themeId,)).rowcount
+            self.conn.execute("DELETE FROM ImportWords")
+        except:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        self.invalidate()
+        self.themesStamp = self.readThemesStamp()
+        return kept, seen - kept
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,109 @@
+import numpy as np
+from grid import A, Z, encodeWord
+
+# Makes sure every hidden word appears exactly once, so whatever the player finds is the copy playMenu gives credit for
+
+class WordMatcher: # Aho-Corasick automaton over byte strings
+    def __init__(self, patterns):
+        self.goto = [{}] # state -> {byte: next state}
+        self.fail = [0]
+        self.out = [[]] # state -> [(pattern length, pattern id)] ending here
+
+        for patternId, pattern in enumerate(patterns): # building the trie
+            state = 0
+            for byte in pattern:
+                if byte not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][byte] = len(self.goto) - 1
+                state = self.goto[state][byte]
+            self.out[state].append((len(pattern), patternId))
+
+        queue = list(self.goto[0].values()) # breadth first, so every fail link points at a state that's already done
+        for state in queue:
+            for byte, nextState in self.goto[state].items():
+                queue.append(nextState)
+                fallback = self.fail[state]
+                while fallback and byte not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nextState] = self.goto[fallback].get(byte, 0)
+                self.out[nextState] = self.out[nextState] + self.out[self.fail[nextState]]
+
+    def scan(self, line): # [(start index, end index, pattern id)] of every match in the line
+        matches = []
+        state = 0
+        for idx, byte in enumerate(line):
+            while state and byte not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(byte, 0)
+            for length, patternId in self.out[state]:
+                matches.append((idx - length + 1, idx, patternId))
+        return matches
+
+_lineCache = {}
+
+def gridLines(size, diagonals=True): # every straight line through the grid, as (xs, ys) index arrays
+    key = (size, diagonals)
+    if key not in _lineCache:
+        lines = []
+        idx = np.arange(size)
+        for y in range(size):
+            lines.append((idx, np.full(size, y))) # along x
+        for x in range(size):
+            lines.append((np.full(size, x), idx)) # along y
+        if diagonals:
+            for offset in range(-(size - 1), size):
+                xs = idx[max(0, -offset):size - max(0, offset)]
+                lines.append((xs, xs + offset)) # down-right
+                lines.append((xs, size - 1 - (xs + offset))) # up-right
+        _lineCache[key] = [line for line in lines if len(line[0]) > 0]
+    return _lineCache[key]
+
+def ensureUnique(grid, words, wordLocations, npRng, diagonals=True, maxRounds=20): # re-fills filler cells until each word occurs exactly once, returns False if it can't
+    patterns, patternWords = [], [] # each word forwards and backwards, mapped back to the word
+    for wordIdx, word in enumerate(words):
+        patterns.append(encodeWord(word).tolist())
+        patternWords.append(wordIdx)
+        if word != word[::-1]: # palindromes would match the same cells twice
+            patterns.append(encodeWord(word[::-1]).tolist())
+            patternWords.append(wordIdx)
+    matcher = WordMatcher(patterns)
+
+    fixed = np.zeros((grid.size, grid.size), dtype=bool) # cells that belong to a placed word
+    planted = set() # the cells of each placed word, so the intended copy isn't counted as extra
+    for wordIdx, (start, end) in enumerate(wordLocations):
+        dx, dy = int(np.sign(end[0] - start[0])), int(np.sign(end[1] - start[1]))
+        cells = frozenset((start[0] + dx * i, start[1] + dy * i) for i in range(len(words[wordIdx])))
+        for x, y in cells:
+            fixed[x, y] = True
+        planted.add((wordIdx, cells))
+
+    lines = gridLines(grid.size, diagonals)
+    toScan = range(len(lines))
+    extras = {} # line index -> [cells of every extra copy found in that line]
+    for _ in range(maxRounds):
+        for lineIdx in toScan:
+            xs, ys = lines[lineIdx]
+            found = []
+            for start, end, patternId in matcher.scan(grid.cells[xs, ys].tolist()):
+                cells = frozenset(zip(xs[start:end + 1].tolist(), ys[start:end + 1].tolist()))
+                if (patternWords[patternId], cells) not in planted:
+                    found.append(cells)
+            extras[lineIdx] = found
+
+        refill = set()
+        for found in extras.values():
+            for cells in found:
+                free = [cell for cell in cells if not fixed[cell]]
+                if not free: # made entirely of placed words, re-filling can't fix it
+                    return False
+                refill.add(free[npRng.integers(len(free))]) # changing one letter is enough to break the copy
+        if not refill:
+            return True
+
+        xs, ys = np.array(sorted(refill)).T
+        grid.cells[xs, ys] = npRng.integers(A, Z + 1, size=len(xs), dtype=np.uint8)
+        toScan = [lineIdx for lineIdx, (lineXs, lineYs) in enumerate(lines) if np.any(np.isin(lineXs * grid.size + lineYs, xs * grid.size + ys))] # only lines through a changed cell
+
+    return False
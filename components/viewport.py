@@ -0,0 +1,54 @@
+# The part of a big grid that is on screen: which cells are visible, and where a grid cell is drawn. Clicks are mapped
+# back to cells by Board.cellAt, from the layout this gives it. The view always starts and ends on whole cells, so
+# nothing has to be clipped
+
+ZOOM_LEVELS = (16, 20, 24, 32, 40, 48, 64) # cell sizes in pixels, smallest first
+
+class Viewport:
+    def __init__(self, gridSize, area, cellPixels=32):
+        self.gridSize = gridSize
+        self.area = area # (x, y, w, h) of the screen the grid is drawn in
+        self.zoom = ZOOM_LEVELS.index(cellPixels) if cellPixels in ZOOM_LEVELS else 0
+        self.originX = 0 # grid position of the top left cell on screen
+        self.originY = 0
+
+    def getCellPixels(self):
+        return ZOOM_LEVELS[self.zoom]
+
+    def getSize(self): # (columns, rows) of cells that fit
+        cellPixels = self.getCellPixels()
+        return min(self.gridSize, self.area[2] // cellPixels), min(self.gridSize, self.area[3] // cellPixels)
+
+    def visibleRange(self): # (range of x, range of y) on screen
+        cols, rows = self.getSize()
+        return range(self.originX, self.originX + cols), range(self.originY, self.originY + rows)
+
+    def toScreen(self, x, y): # top left pixel of a grid cell
+        cellPixels = self.getCellPixels()
+        return self.area[0] + (x - self.originX) * cellPixels, self.area[1] + (y - self.originY) * cellPixels
+
+    def clamp(self): # keeping the view inside the grid
+        cols, rows = self.getSize()
+        self.originX = max(0, min(self.originX, self.gridSize - cols))
+        self.originY = max(0, min(self.originY, self.gridSize - rows))
+
+    def moveTo(self, originX, originY): # returns whether the view moved
+        old = (self.originX, self.originY)
+        self.originX, self.originY = int(originX), int(originY)
+        self.clamp()
+        return (self.originX, self.originY) != old
+
+    def pan(self, dx, dy): # by whole cells
+        return self.moveTo(self.originX + dx, self.originY + dy)
+
+    def zoomAt(self, step, point): # zooming in (step > 0) or out, keeping the cell under point where it is
+        zoom = max(0, min(self.zoom + step, len(ZOOM_LEVELS) - 1))
+        if zoom == self.zoom:
+            return False
+        oldPixels = self.getCellPixels()
+        gridX = self.originX + (point[0] - self.area[0]) / oldPixels # grid position under the point, with the fraction
+        gridY = self.originY + (point[1] - self.area[1]) / oldPixels
+        self.zoom = zoom
+        newPixels = self.getCellPixels()
+        self.moveTo(round(gridX - (point[0] - self.area[0]) / newPixels), round(gridY - (point[1] - self.area[1]) / newPixels))
+        return True
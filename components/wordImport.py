@@ -0,0 +1,61 @@
+import re
+import json
+import time
+import argparse
+
+# Streaming importer for big word lists and dictionaries: the file is read a chunk at a time,
+# words are cleaned up and filtered on the way through, and repeats are dropped by the theme store
+#   python components/wordImport.py words.txt --theme Dictionary --min 3 --max 12
+
+SEPARATORS = re.compile(r"[\s,;]+") # one word per line, or comma separated like the new theme box
+
+def readWords(path, chunkSize=1 << 20): # every raw word in the file, never holding more than a chunk
+    carry = ''
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        while True:
+            chunk = f.read(chunkSize)
+            if not chunk:
+                break
+            parts = SEPARATORS.split(carry + chunk)
+            carry = parts.pop() # might be cut off half way, so it goes on the front of the next chunk
+            for part in parts:
+                if part:
+                    yield part
+    if carry:
+        yield carry
+
+def normaliseWords(words, minLength=3, maxLength=15, stats=None): # upper case A-Z words of an allowed length
+    stats = stats if stats is not None else {}
+    stats.setdefault('read', 0)
+    stats.setdefault('rejected', 0)
+    for word in words:
+        stats['read'] += 1
+        word = word.strip().upper()
+        if not (minLength <= len(word) <= maxLength and word.isascii() and word.isalpha()):
+            stats['rejected'] += 1 # punctuation, digits, accents or the wrong length
+            continue
+        yield word
+
+def importFile(store, themeName, path, minLength=3, maxLength=15, chunkSize=1 << 20): # returns counts and the words / sec
+    stats = {}
+    start = time.perf_counter()
+    kept, repeats = store.importWords(themeName, normaliseWords(readWords(path, chunkSize), minLength, maxLength, stats))
+    stats['seconds'] = time.perf_counter() - start
+    stats['kept'] = kept
+    stats['repeats'] = repeats
+    stats['wordsPerSec'] = stats['read'] / stats['seconds'] if stats['seconds'] else 0
+    return stats
+
+if __name__ == "__main__":
+    from themeStore import ThemeStore
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--theme", required=True)
+    parser.add_argument("--min", type=int, default=3)
+    parser.add_argument("--max", type=int, default=15)
+    args = parser.parse_args()
+
+    store = ThemeStore()
+    print(json.dumps(importFile(store, args.theme, args.path, args.min, args.max)))
+    store.close()